@@ -1,10 +1,19 @@
 import streamlit as st
-from utils.data_manager import load_data, save_data, clear_data, enrich_data
-from utils.api import get_pokemon_names
-from utils.visualisation import plot_pie_chart, plot_scatter, plot_histogram, plot_bar, plot_box, plot_grouped_bar, plot_kde, plot_radar, plot_average_bar
-from utils.api import get_pokemon_region, get_pokemon_details
+from utils.data_manager import load_data, save_data, store_fingerprint, clear_data, enrich_data, load_aggregates, needs_enrichment, add_team, remove_team, StaleDataError, SCHEMA_VERSION, ENRICHMENT_VERSION, STAT_COLUMNS, PARTITION_BY_USER
+from utils.catalogue import get_catalogue, preload_catalogue
+from utils.visualisation import plot_pie_chart, plot_scatter, plot_histogram, plot_bar, plot_box, plot_counts_bar, plot_kde, plot_radar, plot_average_bar, CHART_CACHE
+from utils.prefetch import DetailPrefetcher
+from utils.sprites import team_strips, SPRITE_WIDTH
+from utils.memo import memoize, SECTION_CACHE
+from utils.stats import summarise_measurements, summarise_stats, TOTAL_COLUMN
+from utils.distribution import DISTRIBUTION_CACHE
+from utils.perf import start_run, finish_run, profiled, span, timed, to_jsonl, watch_cache, RUN_HISTORY
+from utils.type_chart import encode_types, popcount, team_codes, team_coverage, team_matchups, TYPES, SHARED_WEAKNESS_MIN
+import os
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
-import plotly.express as px
 from math import ceil
 
 # Constants
@@ -16,73 +25,193 @@ POKEMON_GAMES = [
     "Shining Pearl", "Legends: Arceus", "Scarlet", "Violet"
 ]
 
-# Load Pokémon names from API or fallback to a local list
-POKEMON_NAMES = get_pokemon_names()
+# Teams listed per sidebar page
+TEAMS_PER_PAGE = 10
+
+# Show the performance debug panel, also shown for the ?debug=1 query parameter
+DEBUG_PANEL = os.environ.get("POKEGAMEDEX_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Hit ratios of the in-memory caches are reported in the debug panel
+watch_cache("sections", SECTION_CACHE)
+watch_cache("charts", CHART_CACHE)
+watch_cache("distributions", DISTRIBUTION_CACHE)
 
 # Helper function to refresh app
 def refresh_app():
     st.session_state["needs_refresh"] = True
 
+# Helper function to pick the team store partition for this session
+def current_user():
+    if not PARTITION_BY_USER:
+        return None
+    return st.query_params.get("user") or None
+
+# Helper function to check whether the performance debug panel is shown
+def debug_enabled():
+    return DEBUG_PANEL or st.query_params.get("debug") == "1"
+
 def main():
+    debug = debug_enabled()
+    st.session_state["reruns"] = st.session_state.get("reruns", 0) + 1
+    # Only this session's reruns are recorded for its debug panel, other sessions are unaffected
+    run = start_run(f"rerun {st.session_state['reruns']}", record=debug)
+
+    # Profile this rerun if it was requested from the debug panel
+    profile = run is not None and st.session_state.pop("profile_rerun", False)
+    with profiled(run) if profile else nullcontext():
+        render_page()
+
+    run = finish_run()
+    if run is not None:
+        # Each session exports only its own reruns
+        st.session_state.setdefault("perf_runs", deque(maxlen=RUN_HISTORY)).append(run)
+    if debug:
+        debug_panel(run)
+
+def render_page():
     st.title("Pokémon Team Tracker and Analysis")
 
+    # Fetch Pokémon names in the background, off the critical path
+    preload_catalogue()
+
     data = initialise()
 
-    sidebar(data);
+    # Sections reuse their results until the team store is written to
+    with span("fingerprint"):
+        key = store_fingerprint(data, user=current_user())
+
+    sidebar(data, key);
 
     # Analysis Section
     if data.empty:
         st.warning("No data to analyse yet!")
     else:
+
         # Exclude placeholders for meaningful stats
-        valid_data = data[(data["Pokemon"] != "None") & (data["Acquisition"] != "N/A")]
-        
-        total_playthroughs = general_analysis(valid_data, data)
-        status_analysis(valid_data, total_playthroughs)
-        regional_analysis(valid_data)
-        type_analysis(valid_data)      
-        stats_analysis(valid_data)
-        insight_analysis(valid_data)
+        valid_data = memoize("valid_data", key, select_valid_data, data)
+
+        # Headline counts come from counters updated with each saved or deleted team, not from the rows
+        with span("load_aggregates"):
+            aggregates = load_aggregates(data, user=current_user())
+
+        total_playthroughs = general_analysis(aggregates)
+        status_analysis(aggregates, total_playthroughs)
+        regional_analysis(aggregates)
+        type_analysis(valid_data, aggregates, key)
+        matchup_analysis(valid_data, key)
+        stats_analysis(valid_data, aggregates, key)
+        insight_analysis(valid_data, key)
 
         # Acquisition Breakdown
-        st.subheader("Acquisition Breakdown")
-        acquisition_counts = valid_data["Acquisition"].value_counts()
-        st.bar_chart(acquisition_counts)
+        with span("acquisition_analysis"):
+            st.subheader("Acquisition Breakdown")
+            st.bar_chart(aggregates.acquisition_counts())
+
+def debug_panel(run):
+    """Show where the last rerun's time went, with HTTP counters and cache hit ratios."""
+    with st.expander("Performance", expanded=True):
+        st.button("Profile next rerun", on_click=lambda: st.session_state.update(profile_rerun=True),
+                  help="Run the next rerun under cProfile and list its slowest functions here.")
+        if run is None:
+            st.info("No rerun has been recorded yet.")
+            return
+
+        counters = run.counters
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rerun", f"{run.seconds:.2f} s")
+        col2.metric("HTTP requests", counters.get("http.requests", 0), help=f"{counters.get('http.retries', 0)} retries, {counters.get('http.errors', 0)} errors")
+        col3.metric("Downloaded", f"{counters.get('http.bytes', 0) / 1024:.1f} KiB")
+        col4.metric("Slowest span", next(iter(run.span_totals()), "-"))
+
+        ratios = run.hit_ratios()
+        st.write("**Cache hit ratios**: " + ", ".join(
+            f"{name} {ratio:.0%}" if ratio is not None else f"{name} unused" for name, ratio in ratios.items()
+        ))
+
+        totals = pd.DataFrame(
+            [(name, calls, seconds) for name, (calls, seconds) in run.span_totals().items()],
+            columns=["Span", "Calls", "Seconds"]
+        )
+        st.dataframe(totals, hide_index=True)
+        with st.expander(f"Timeline ({len(run.spans)} spans{f', {run.dropped_spans} dropped' if run.dropped_spans else ''})"):
+            timeline = pd.DataFrame(run.spans)
+            if not timeline.empty:
+                timeline = timeline.sort_values("start")
+                timeline["name"] = ["  " * depth + name for depth, name in zip(timeline["depth"], timeline["name"])]
+            st.dataframe(timeline, hide_index=True)
+
+        if run.profile:
+            st.code(run.profile, language=None)
+
+        st.download_button("Export JSON lines", to_jsonl(list(st.session_state.get("perf_runs", []))), file_name="pokegamedex_perf.jsonl", mime="application/x-ndjson")
+
+def select_valid_data(data):
+    return data[(data["Pokemon"] != "None") & (data["Acquisition"] != "N/A")]
 
         
 
+@timed()
 def initialise():
     # Load data
-    data = load_data()
-    data = enrich_data(data)  # Add missing details
-    save_data(data)  # Save the updated dataset
+    user = current_user()
+    data = load_data(user=user)
+
+    # Only fetch and save when some rows are missing details or are out of date
+    for _ in range(3):
+        if not needs_enrichment(data).any():
+            break
+        version = data.attrs.get("store_version")
+        data = enrich_data(data)  # Add missing details
+        try:
+            # Save the updated dataset, which is now the stored version
+            data.attrs["store_version"] = save_data(data, expected_version=version, user=user)
+            break
+        except StaleDataError:
+            # Another session saved in the meantime, enrich its data instead of overwriting it
+            data = load_data(user=user)
     return data
 
-def sidebar(data):
+@timed()
+def sidebar(data, key):
     # Sidebar: Manage Teams
     st.sidebar.header("Manage Teams")
     if not data.empty:
-        grouped = data.groupby(["Game", "Playthrough"])
-        for (game, playthrough), group in grouped:
+        index, order = memoize("team_index", key, build_team_index, data)
+        games = ["All Games"] + list(index["Game"].unique())
+        # Changing the filter starts again from the first page
+        first_page = lambda: st.session_state.update(team_page=1)
+        game_filter = st.sidebar.selectbox("Filter by Game", games, key="team_game_filter", on_change=first_page)
+        query = st.sidebar.text_input("Search Teams", key="team_search", placeholder="Game, playthrough or Pokémon", on_change=first_page)
+        matches = filter_teams(index, None if game_filter == "All Games" else game_filter, query)
+
+        # Only the current page of teams is rendered
+        pages = max(1, ceil(len(matches) / TEAMS_PER_PAGE))
+        st.session_state["team_page"] = min(st.session_state.get("team_page", 1), pages)
+        if pages > 1:
+            st.sidebar.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="team_page")
+        first = (st.session_state["team_page"] - 1) * TEAMS_PER_PAGE
+        page = matches.iloc[first:first + TEAMS_PER_PAGE]
+        if page.empty:
+            st.sidebar.info("No teams match the filter.")
+        else:
+            st.sidebar.caption(f"Showing teams {first + 1}–{first + len(page)} of {len(matches)}")
+
+        # Each team's sprites are served as one locally cached strip instead of remote images
+        sprites_per_team = team_sprites(data, order, page)
+        strips = team_strips(sprites_per_team)
+        for game, playthrough, sprites, strip in zip(page["Game"], page["Playthrough"], sprites_per_team, strips):
             st.sidebar.write(f"**{game} Playthrough {playthrough}**")
 
-            sprites = []
-            for _, row in group.iterrows():
-                sprite_url = row.get("Sprite URL", None)
-                if sprite_url:
-                    sprites.append(sprite_url)
-
-            # Display sprites as images in a single horizontal row
-            if sprites:
-                st.sidebar.image(sprites, width=40, caption=None, use_column_width=False)
+            # Display sprites as a single horizontal strip
+            if strip:
+                st.sidebar.image(strip, width=SPRITE_WIDTH * len(sprites), caption=None)
 
             if st.sidebar.button(f"Delete Team ({game} Playthrough {playthrough})", key=f"delete_{game}_{playthrough}"):
-                data = data[(data["Game"] != game) | (data["Playthrough"] != playthrough)]
-                save_data(data)
+                remove_team(game, playthrough, user=current_user())
                 refresh_app()
 
     if st.sidebar.button("Clear All Data"):
-        clear_data()
+        clear_data(user=current_user())
         refresh_app()
 
     # Add New Team
@@ -94,19 +223,26 @@ def sidebar(data):
         # Initialise session state for the new team
         if "new_team" not in st.session_state:
             st.session_state["new_team"] = [{"Pokemon": "None", "Acquisition": "N/A"} for _ in range(6)]
+            st.session_state["prefetch"] = DetailPrefetcher()
 
     if "new_team" in st.session_state:
         st.sidebar.write("### Enter Pokémon Details")
+        # Load Pokémon names lazily, from API or fallback to a local list
+        catalogue = get_catalogue(block=False)
+        if not catalogue:
+            st.sidebar.info("Loading Pokémon names...")
+        # Details are fetched in the background as soon as a Pokémon is picked, so saving only waits on the last picks
+        prefetch = st.session_state.setdefault("prefetch", DetailPrefetcher())
         for i in range(6):
             col1, col2 = st.sidebar.columns(2)
             with col1:
                 st.session_state["new_team"][i]["Pokemon"] = st.selectbox(
                     f"Select Pokémon {i + 1}",
-                    ["None"] + POKEMON_NAMES,
-                    index=0 if st.session_state["new_team"][i]["Pokemon"] == "None"
-                    else POKEMON_NAMES.index(st.session_state["new_team"][i]["Pokemon"]) + 1,
+                    ["None"] + catalogue.names,
+                    index=pokemon_index(catalogue, st.session_state["new_team"][i]["Pokemon"]),
                     key=f"new_pokemon_{i}"
                 )
+                prefetch.select(i, st.session_state["new_team"][i]["Pokemon"])
             with col2:
                 st.session_state["new_team"][i]["Acquisition"] = st.selectbox(
                     f"Acquisition {i + 1}",
@@ -119,16 +255,20 @@ def sidebar(data):
                 )
 
         if st.sidebar.button("Save Team"):
-            for entry in st.session_state["new_team"]:
-                entry.update({"Game": selected_game, "Playthrough": playthrough_number})
+            for i, entry in enumerate(st.session_state["new_team"]):
+                entry.update({"Game": selected_game, "Playthrough": playthrough_number, "Schema Version": SCHEMA_VERSION})
                 
-                # Fetch additional details for the Pokémon
+                # Join the details prefetched for the Pokémon
                 if entry["Pokemon"] != "None":
-                    details = get_pokemon_details(entry["Pokemon"])
+                    details = prefetch.details(i, entry["Pokemon"])
                     entry.update(details)
+                    if "Base Stats" in details:
+                        entry["Enrichment Version"] = ENRICHMENT_VERSION
                 else:
+                    entry["Enrichment Version"] = ENRICHMENT_VERSION
                     # Default values for None
                     entry.update({
+                        "Region": None,
                         "Legendary": False,
                         "Starter": False,
                         "Evolution Stage": None,
@@ -139,138 +279,226 @@ def sidebar(data):
                         "Type": []
                     })
             
-            data = pd.concat([data, pd.DataFrame(st.session_state["new_team"])], ignore_index=True)
-            save_data(data)
+            add_team(selected_game, playthrough_number, st.session_state["new_team"], user=current_user())
             del st.session_state["new_team"]
+            st.session_state.pop("prefetch").cancel()
             refresh_app()
 
-def general_analysis(valid_data, data):
+def build_team_index(data):
+    """Build one row per (Game, Playthrough) team, in sidebar order, with its search text.
+
+    Rows are grouped by team with one stable sort instead of a Python call per
+    team. Returns the index and the row positions in team order, which each
+    team's Start and Stop point into.
+    """
+    codes, teams = team_codes(data)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes, team_numbers = codes[order], np.arange(len(teams))
+    starts = np.searchsorted(sorted_codes, team_numbers, side="left")
+
+    # Each team's member names, joined by adding the strings of its rows together.
+    # Names are formatted once per distinct Pokémon, missing ones take the trailing ""
+    name_codes, names = pd.factorize(data["Pokemon"])
+    tokens = np.array(["" if name == "None" else f"{name} " for name in names] + [""], dtype=object)[name_codes[order]]
+    members = np.add.reduceat(tokens, starts) if len(tokens) else np.array([], dtype=str)
+
+    index = teams.to_frame(index=False)
+    index["Search"] = (
+        index["Game"].astype(str) + " playthrough " + index["Playthrough"].astype(str) + " " + members
+    ).str.lower()
+    index["Start"] = starts
+    index["Stop"] = np.searchsorted(sorted_codes, team_numbers, side="right")
+    return index, order
+
+def team_sprites(data, order, page):
+    """Return the sprite URLs of each team on a page of the team index, in slot order."""
+    if "Sprite URL" not in data.columns:
+        return [[] for _ in range(len(page))]
+    urls = data["Sprite URL"].to_numpy(dtype=object)
+    return [
+        [url for url in urls[order[start:stop]] if pd.notna(url) and url]
+        for start, stop in zip(page["Start"], page["Stop"])
+    ]
+
+def filter_teams(index, game=None, query=""):
+    """Return the teams of one game, or every game, whose search text contains every word of query."""
+    mask = pd.Series(True, index=index.index)
+    if game is not None:
+        mask &= index["Game"] == game
+    for word in query.lower().split():
+        mask &= index["Search"].str.contains(word, regex=False)
+    return index[mask]
+
+def pokemon_index(catalogue, name):
+    """Return the selectbox index for a Pokémon, where 0 is "None"."""
+    if name == "None":
+        return 0
+    position = catalogue.position(name)
+    if position is None:
+        # Fall back to the closest listed name if the catalogue has changed
+        matches = catalogue.search(name, limit=1)
+        position = catalogue.position(matches[0]) if matches else None
+    return 0 if position is None else position + 1
+
+@timed()
+def general_analysis(aggregates):
     # Statistical calculations
         st.subheader("General")
-        total_pokemon_used = len(valid_data)
-        unique_pokemon = valid_data["Pokemon"].nunique()
-        total_games_played = data["Game"].nunique()
-        total_playthroughs = data[["Game", "Playthrough"]].drop_duplicates().shape[0]
-        avg_playthroughs_per_game = (
-            total_playthroughs / total_games_played if total_games_played > 0 else 0
-        )
+        general = compute_general(aggregates)
 
         # Display statistical sentences
         st.markdown(f"""
-        - **Total Pokémon used**: {total_pokemon_used} (Unique: {unique_pokemon})
-        - **Total Games Played**: {total_games_played}
-        - **Total Playthroughs**: {total_playthroughs} (Avg: {avg_playthroughs_per_game:.2f} per game)
+        - **Total Pokémon used**: {general["total_pokemon_used"]} (Unique: {general["unique_pokemon"]})
+        - **Total Games Played**: {general["total_games_played"]}
+        - **Total Playthroughs**: {general["total_playthroughs"]} (Avg: {general["avg_playthroughs_per_game"]:.2f} per game)
         """)
 
-        # Most Commonly Used Pokemon
-        pokemon_counts = valid_data["Pokemon"].value_counts().head(10).reset_index()
-        pokemon_counts.columns = ["Pokémon", "Count"]
-
-        # Create interactive bar chart
-        fig = px.bar(pokemon_counts, x="Pokémon", y="Count", title="Top 10 Most Commonly Used Pokémon")
+        # Create interactive bar chart, importing plotly only once a chart is drawn
+        import plotly.express as px
+        fig = px.bar(general["pokemon_counts"], x="Pokémon", y="Count", title="Top 10 Most Commonly Used Pokémon")
         st.plotly_chart(fig)
 
-        return total_playthroughs;
-
-def status_analysis(valid_data, total_playthroughs):
+        return general["total_playthroughs"]
+def compute_general(aggregates):
+    """Compute the headline usage numbers and the most commonly used Pokémon."""
+    total_games_played = aggregates.total("games")
+    total_playthroughs = aggregates.total("playthroughs")
+
+    # Most Commonly Used Pokemon
+    pokemon_counts = aggregates.pokemon_counts(limit=10).reset_index()
+    pokemon_counts.columns = ["Pokémon", "Count"]
+
+    return {
+        "total_pokemon_used": aggregates.total("valid"),
+        "unique_pokemon": len(aggregates.pokemon_counts()),
+        "total_games_played": total_games_played,
+        "total_playthroughs": total_playthroughs,
+        "avg_playthroughs_per_game": total_playthroughs / total_games_played if total_games_played > 0 else 0,
+        "pokemon_counts": pokemon_counts,
+    }
+
+@timed()
+def status_analysis(aggregates, total_playthroughs):
     st.subheader("Pokémon Status")
         
-    total_starters = valid_data["Starter"].sum()
+    total_starters, legendary_usage = aggregates.total("starters"), aggregates.total("legendaries")
     avg_starters_per_team = total_starters / total_playthroughs if total_playthroughs > 0 else 0
-
-    legendary_usage = valid_data["Legendary"].sum()
-    avg_legendaries_per_team = legendary_usage / total_playthroughs
+    avg_legendaries_per_team = legendary_usage / total_playthroughs if total_playthroughs > 0 else 0
 
     st.markdown(f"""
         - **Starter Pokémon Usage**: {total_starters} (Avg: {avg_starters_per_team:.2f} per team)
         - **Legendary Pokémon Usage**: {legendary_usage} (Avg: {avg_legendaries_per_team:.2f} per team)
         """)
 
-def type_analysis(valid_data):
+@timed()
+def type_analysis(valid_data, aggregates, key):
     st.subheader("Pokémon Type Analysis")
-    # Explode types for valid data
     if "Type" in valid_data.columns:
-        valid_data["Type"] = valid_data["Type"].apply(lambda x: eval(x) if isinstance(x, str) else x)
-
-        type_insights = generate_type_insights(valid_data)
-        for insight in type_insights:
+        type_counts = aggregates.type_counts()
+        unique_types_per_team = memoize("type_coverage", key, compute_type_coverage, valid_data)
+        for insight in generate_type_insights(type_counts, aggregates.type_counts(starters=True), unique_types_per_team):
             st.markdown(f"- {insight}")
 
-        # Explode types for independent analysis
-        exploded_types = valid_data.explode("Type")
-
         # Most Common Type
-        type_counts = exploded_types["Type"].value_counts()
         col1, col2 = st.columns(2)
         if not type_counts.empty:
             with col1:
                 plot_pie_chart(type_counts, "Type Distribution")
                 
             with col2:
-                plot_grouped_bar(valid_data.explode("Type"), category_col="Type", 
-                title="Pokémon Counts by Type", x_label="Type", y_label="Count")
+                plot_counts_bar(type_counts, title="Pokémon Counts by Type", x_label="Type", y_label="Count")
 
         # Type Coverage Per Team
-        unique_types_per_team = valid_data.groupby(["Game", "Playthrough"])["Type"].apply(
-            lambda types: len(set(t for sublist in types if isinstance(sublist, list) for t in sublist))
-        )
         st.markdown("**Type Coverage Per Team**")
         st.table(unique_types_per_team.reset_index(name="Unique Types"))
-def generate_type_insights(valid_data):
+def compute_type_coverage(valid_data):
+    """Compute the number of distinct types on each team."""
+    # Each Pokémon's types are encoded once as a bitmask, so no exploded frames are built
+    coverage = team_coverage(valid_data, encode_types(valid_data))
+    return pd.Series(popcount(coverage.to_numpy()), index=coverage.index)
+def generate_type_insights(type_counts, starter_type_counts, unique_types_per_team):
     """Generate insights related to Pokémon types."""
     insights = []
-    # Explode types for analysis
-    exploded_types = valid_data.explode("Type")
 
     # Most Common Type
-    type_counts = exploded_types["Type"].value_counts()
     if not type_counts.empty:
         most_common_type = type_counts.idxmax()
         most_common_type_count = type_counts.max()
         insights.append(f"The most common type is {most_common_type}, appearing {most_common_type_count} times.")
 
     # Starter Pokémon Type Analysis
-    starter_data = valid_data[valid_data["Starter"]]
-    exploded_starter_types = starter_data.explode("Type")
-    if not exploded_starter_types.empty:
-        starter_type_counts = exploded_starter_types["Type"].value_counts()
+    if not starter_type_counts.empty:
         most_common_starter_type = starter_type_counts.idxmax()
         most_common_starter_type_count = starter_type_counts.max()
         insights.append(f"The most common starter type is {most_common_starter_type}, appearing {most_common_starter_type_count} times among starter Pokémon.")
 
     # Type Coverage Insights
-    unique_types_per_team = valid_data.groupby(["Game", "Playthrough"])["Type"].apply(
-        lambda types: len(set(t for sublist in types if isinstance(sublist, list) for t in sublist))
-    )
     if not unique_types_per_team.empty:
         average_types_per_playthrough = unique_types_per_team.mean()
         insights.append(f"On average, teams cover {average_types_per_playthrough:.2f} unique types per playthrough.")
 
     return insights
 
-def stats_analysis(valid_data):
-    st.subheader("Pokémon Stats Analysis")
+@timed()
+def matchup_analysis(valid_data, key):
+    st.subheader("Team Type Matchups")
+    if "Type" not in valid_data.columns:
+        return
+    matchups = memoize("matchups", key, compute_matchups, valid_data)
+    for insight in matchups["insights"]:
+        st.markdown(f"- {insight}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        plot_bar(matchups["exposed_teams"], title="Teams Weak to Each Attacking Type", x_label="Attacking Type", y_label="Teams")
+    with col2:
+        plot_bar(matchups["unhit_teams"], title="Teams Without a Super Effective Type", x_label="Defending Type", y_label="Teams")
+
+    # Matchups Per Team
+    st.markdown("**Matchups Per Team**")
+    st.dataframe(matchups["teams"].reset_index(), hide_index=True)
+def compute_matchups(valid_data):
+    """Compute every team's offensive coverage, weaknesses and resistances from the type chart."""
+    matchups = team_matchups(valid_data, encode_types(valid_data))
+    matchups["insights"] = generate_matchup_insights(matchups)
+    return matchups
+def generate_matchup_insights(matchups):
+    """Generate insights about team type matchups."""
+    insights = []
+    teams = matchups["teams"]
+    if teams.empty:
+        return insights
 
-    # Prepare Base Stats as a DataFrame
-    valid_data["Base Stats"] = valid_data["Base Stats"].apply(eval)  # Convert strings to dictionaries
-    base_stats_df = pd.DataFrame(valid_data["Base Stats"].tolist())
-    base_stats_df["Pokemon"] = valid_data["Pokemon"]
+    # Offensive coverage
+    average_coverage = teams["Offensive Coverage"].mean()
+    insights.append(f"On average, teams hit {average_coverage:.2f} of {len(TYPES)} types super effectively.")
+    best_game, best_playthrough = teams["Offensive Coverage"].idxmax()
+    insights.append(f"{best_game} playthrough {best_playthrough} has the widest coverage, hitting {teams['Offensive Coverage'].max()} types super effectively.")
 
-    # Ensure numeric columns only
-    numeric_stats = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
-    base_stats_df = base_stats_df[numeric_stats + ["Pokemon"]]
+    # Defensive weak points
+    exposed_teams = matchups["exposed_teams"]
+    if exposed_teams.max() > 0:
+        insights.append(f"{exposed_teams.idxmax()} is the most common weak point, with {exposed_teams.max()} teams having more members weak to it than resisting it.")
+    shared_weakness_teams = matchups["shared_weakness_teams"]
+    if shared_weakness_teams.max() > 0:
+        insights.append(f"{shared_weakness_teams.max()} teams have {SHARED_WEAKNESS_MIN} or more members weak to {shared_weakness_teams.idxmax()}.")
 
-    # Calculate stat totals
-    base_stats_df["Stat Total"] = base_stats_df[numeric_stats].apply(pd.to_numeric, errors='coerce').sum(axis=1)
+    return insights
 
-    # Calculate overall stats
-    avg_stats = base_stats_df[numeric_stats].mean()
-    min_stat = base_stats_df[numeric_stats].min()
-    max_stat = base_stats_df[numeric_stats].max()
-    median_stats = base_stats_df[numeric_stats].median()
+@timed()
+def stats_analysis(valid_data, aggregates, key):
+    st.subheader("Pokémon Stats Analysis")
 
-    # Generate and display insights
-    stat_insights = generate_stat_insights(avg_stats, base_stats_df)
+    numeric_stats = STAT_COLUMNS
+    # Average stats and their spread come from the running sums kept with the aggregates
+    avg_stats = aggregates.stat_means().reindex(numeric_stats)
+    summary, stat_insights = memoize("stats", key, compute_stats, valid_data, avg_stats, aggregates.stat_stds())
+    if not len(summary):
+        st.info("No Pokémon with base stats to analyse yet.")
+        return
+    base_stats_df = summary.frame()
+
+    # Display insights
     for insight in stat_insights:
         st.markdown(f"- {insight}")
 
@@ -295,7 +523,7 @@ def stats_analysis(valid_data):
     for idx, stat in enumerate(numeric_stats):
         with columns[idx % len(columns)]:
             plot_box(
-                data=base_stats_df,
+                summary=summary,
                 column=stat,
                 title=f"Box Plot for {stat.capitalize()}",
                 y_label=f"{stat.capitalize()} Value"
@@ -304,8 +532,8 @@ def stats_analysis(valid_data):
     # Box Plot for Base Stat Totals
     st.markdown("##### Box Plot: Base Stat Totals")
     plot_box(
-        data=base_stats_df,
-        column="Stat Total",
+        summary=summary,
+        column=TOTAL_COLUMN,
         title="Box Plot for Base Stat Totals",
         y_label="Stat Total"
     )
@@ -319,16 +547,18 @@ def stats_analysis(valid_data):
                 data=base_stats_df,
                 column=stat,
                 title=f"Distribution of {stat.capitalize()}",
-                x_label=f"{stat.capitalize()} Value"
+                x_label=f"{stat.capitalize()} Value",
+                key=key
             )
 
     # Histogram for Base Stat Totals
     st.markdown("##### Histogram: Base Stat Totals")
     plot_histogram(
         data=base_stats_df,
-        column="Stat Total",
+        column=TOTAL_COLUMN,
         title="Distribution of Base Stat Totals",
-        x_label="Stat Total"
+        x_label="Stat Total",
+        key=key
     )
 
     # KDE for Individual Stats
@@ -340,103 +570,106 @@ def stats_analysis(valid_data):
                 data=base_stats_df,
                 column=stat,
                 title=f"Distribution of {stat.capitalize()}",
-                x_label=f"{stat.capitalize()} Value"
+                x_label=f"{stat.capitalize()} Value",
+                key=key
             )
 
     # KDE for Base Stat Totals
     st.markdown("##### KDE: Base Stat Totals")
     plot_kde(
         data=base_stats_df,
-        column="Stat Total",
+        column=TOTAL_COLUMN,
         title="Distribution of Base Stat Totals",
-        x_label="Stat Total"
+        x_label="Stat Total",
+        key=key
     )
-def generate_stat_insights(stats, exploded_data):
+def compute_stats(valid_data, averages, spreads):
+    """Summarise base stats in one pass and generate stat insights."""
+    summary = summarise_stats(valid_data)
+    return summary, generate_stat_insights(summary, averages, spreads)
+def generate_stat_insights(summary, averages, spreads):
     """Generate insights for average stats, specific Pokémon, and statistical measures."""
     insights = []
+    if not len(summary):
+        return insights
 
     # Overall average stats
+    stats = averages.dropna()
     highest_stat = stats.idxmax()
     lowest_stat = stats.idxmin()
-    highest_stat_pokemon = exploded_data.loc[exploded_data[highest_stat].idxmax(), "Pokemon"]
-    lowest_stat_pokemon = exploded_data.loc[exploded_data[lowest_stat].idxmin(), "Pokemon"]
 
     insights.append(f"The highest average stat is {highest_stat.capitalize()} with {stats[highest_stat]:.2f}.")
     insights.append(f"The lowest average stat is {lowest_stat.capitalize()} with {stats[lowest_stat]:.2f}.")
+    spreads = spreads.dropna()
+    if not spreads.empty:
+        insights.append(f"{spreads.idxmax().capitalize()} varies the most, with a standard deviation of {spreads.max():.2f}.")
 
     # Base stat totals
-    exploded_data["Stat Total"] = exploded_data[["hp", "attack", "defense", "special-attack", "special-defense", "speed"]].sum(axis=1)
-    max_total_pokemon = exploded_data.loc[exploded_data["Stat Total"].idxmax(), "Pokemon"]
-    min_total_pokemon = exploded_data.loc[exploded_data["Stat Total"].idxmin(), "Pokemon"]
-    avg_total = exploded_data["Stat Total"].mean()
-    median_total = exploded_data["Stat Total"].median()
-    std_total = exploded_data["Stat Total"].std()
-    min_total = exploded_data["Stat Total"].min()
-    max_total = exploded_data["Stat Total"].max()
-
-    insights.append(f"The highest base stat total is {max_total} by {max_total_pokemon}.")
-    insights.append(f"The lowest base stat total is {min_total} by {min_total_pokemon}.")
-    insights.append(f"On average, Pokémon have a base stat total of {avg_total:.2f}.")
-    insights.append(f"The median base stat total is {median_total:.2f}, with a standard deviation of {std_total:.2f}.")
+    total = summary.column(TOTAL_COLUMN)
+    insights.append(f"The highest base stat total is {total['max']} by {total['max_pokemon']}.")
+    insights.append(f"The lowest base stat total is {total['min']} by {total['min_pokemon']}.")
+    insights.append(f"On average, Pokémon have a base stat total of {total['mean']:.2f}.")
+    insights.append(f"The median base stat total is {total['median']:.2f}, with a standard deviation of {total['std']:.2f}.")
 
     # Range for base stat total
-    range_total = max_total - min_total
-    insights.append(f"The range of base stat totals is {range_total}, from {min_total} to {max_total}.")
+    range_total = total["max"] - total["min"]
+    insights.append(f"The range of base stat totals is {range_total}, from {total['min']} to {total['max']}.")
 
     # Stat-specific box plot insights
-    for stat in ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]:
-        max_stat_pokemon = exploded_data.loc[exploded_data[stat].idxmax(), "Pokemon"]
-        min_stat_pokemon = exploded_data.loc[exploded_data[stat].idxmin(), "Pokemon"]
-        max_stat_value = exploded_data[stat].max()
-        min_stat_value = exploded_data[stat].min()
-
-        insights.append(f"The highest {stat.capitalize()} is {max_stat_value} by {max_stat_pokemon}.")
-        insights.append(f"The lowest {stat.capitalize()} is {min_stat_value} by {min_stat_pokemon}.")
+    for stat in STAT_COLUMNS:
+        column = summary.column(stat)
+        insights.append(f"The highest {stat.capitalize()} is {column['max']} by {column['max_pokemon']}.")
+        insights.append(f"The lowest {stat.capitalize()} is {column['min']} by {column['min_pokemon']}.")
 
     return insights
 
-def insight_analysis(valid_data):
+@timed()
+def insight_analysis(valid_data, key):
     st.subheader("Other Pokémon Insights")
-    height_weight_insights = generate_height_weight_insights(valid_data)
+    height_weight_insights = memoize("height_weight", key, generate_height_weight_insights, valid_data)
     for insight in height_weight_insights:
         st.markdown(f"- {insight}")
 
+    measurements = memoize("measurements", key, summarise_measurements, valid_data)
     box1, box2 = st.columns(2)
     with box1:
         # Height Box Plot
-        plot_box(valid_data, column="Height", 
+        plot_box(measurements, column="Height", 
             title="Pokémon Height Spread", 
             y_label="Height (m)")
         
     with box2:
         # Weight Box Plot
-        plot_box(valid_data, column="Weight", 
+        plot_box(measurements, column="Weight", 
             title="Pokémon Weight Spread", 
             y_label="Weight (kg)")
 
     plot_scatter(valid_data, x_col="Height", y_col="Weight", 
              title="Height vs Weight", 
              x_label="Height (m)", 
-             y_label="Weight (kg)")
+             y_label="Weight (kg)",
+             key=key)
 
     histo1, histo2 = st.columns(2)
     with histo1:
         # Height Histogram
         plot_histogram(valid_data, column="Height", 
                title="Height Distribution (Histogram)", 
-               x_label="Height (m)")
+               x_label="Height (m)",
+               key=key)
 
     with histo2:
         # Weight Histogram
         plot_histogram(valid_data, column="Weight", 
                title="Weight Distribution (Histogram)", 
-               x_label="Weight (kg)")
+               x_label="Weight (kg)",
+               key=key)
         
     kde1, kde2 = st.columns(2)
     with kde1:
-        plot_kde(valid_data, column="Height", title="Height Distribution (KDE)", x_label="Height (m)")
+        plot_kde(valid_data, column="Height", title="Height Distribution (KDE)", x_label="Height (m)", key=key)
     with kde2:
-        plot_kde(valid_data, column="Weight", title="Weight Distribution (KDE)", x_label="Weight (kg)")
+        plot_kde(valid_data, column="Weight", title="Weight Distribution (KDE)", x_label="Weight (kg)", key=key)
 def generate_height_weight_insights(data):
     """Generate textual insights from height and weight statistics."""
     insights = []
@@ -480,37 +713,31 @@ def generate_height_weight_insights(data):
 
     return insights
 
-def regional_analysis(valid_data):
-    # Fetch region for each Pokémon
-    valid_data["Region"] = valid_data["Pokemon"].apply(get_pokemon_region)
+@timed()
+def regional_analysis(aggregates):
+    region_counts = aggregates.region_counts()
+    region_insights = generate_region_insights(region_counts)
 
     # Regional Analysis
     st.header("Regional Analysis")
-    region_insights = generate_region_insights(valid_data)
     for insight in region_insights:
         st.markdown(f"- {insight}")
 
-    # Count Pokémon by region
-    region_counts = valid_data["Region"].value_counts()
-
     # Display analysis
     col1, col2 = st.columns(2)
     with col1:
         plot_pie_chart(region_counts, "Regional Distribution of Pokémon")
     with col2:
         plot_bar(region_counts, title="Pokémon Counts by Region", x_label="Region", y_label="Count")
-def generate_region_insights(data):
-    """Generate insights from regional Pokémon data."""
+def generate_region_insights(region_counts):
+    """Generate insights from the number of Pokémon used from each region."""
     insights = []
 
     # Check if the dataset is empty
-    if data.empty or "Region" not in data.columns:
+    if region_counts.empty:
         insights.append("No regional data available for analysis.")
         return insights
 
-    # Count Pokémon by region
-    region_counts = data["Region"].value_counts()
-
     # Total Pokémon and unique regions
     total_pokemon = region_counts.sum()
     unique_regions = region_counts.index.nunique()
@@ -0,0 +1,233 @@
+"""A local stand-in for PokeAPI, serving recorded or synthetic payloads with configurable latency.
+
+Recorded payloads come from the app's response cache:
+
+    python -m benchmarks.fake_api --record recordings.jsonl
+
+and are served in preference to the synthetic species from benchmarks/synthetic.py:
+
+    python -m benchmarks.fake_api --port 8765 --latency 0.05 --recordings recordings.jsonl
+    POKEAPI_BASE_URL=http://127.0.0.1:8765/api/v2/ streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from benchmarks.synthetic import SPECIES_COUNT, species_catalogue
+from utils.data_manager import STAT_COLUMNS
+
+API_PREFIX = "/api/v2/"
+
+# A 1×1 transparent PNG served for every sprite, as written by PIL
+SPRITE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d4944415478da63606060600000000500017aa857500000000049454e44ae426082"
+)
+
+
+def resource_key(url):
+    """Return the part of a PokeAPI URL after /api/v2/, without a trailing slash, e.g. "pokemon/pikachu"."""
+    parts = urlsplit(url)
+    path = parts.path.split(API_PREFIX, 1)[-1].strip("/")
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def load_recordings(path):
+    """Read recorded payloads from a JSON lines file of {"url", "payload"} objects.
+
+    Returns resource key -> (base URL the payload was recorded from, payload).
+    """
+    recordings = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                base_url = entry["url"].split(API_PREFIX, 1)[0] + API_PREFIX
+                recordings[resource_key(entry["url"])] = (base_url, entry["payload"])
+    return recordings
+
+
+def record_payloads(output):
+    """Write every response in the app's cache to a JSON lines file, returning how many were written."""
+    from utils.cache import iter_entries
+    count = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for url, payload in iter_entries():
+            f.write(json.dumps({"url": url, "payload": payload}, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+class FakePokeAPI:
+    """A threaded HTTP server answering PokeAPI requests, usable as a context manager."""
+
+    def __init__(self, species=SPECIES_COUNT, seed=0, latency=0.0, recordings=None, host="127.0.0.1", port=0):
+        self.catalogue = species_catalogue(species, seed)
+        self.latency = latency
+        self.recordings = load_recordings(recordings) if recordings else {}
+        self.stats = {"requests": 0, "not_modified": 0, "not_found": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-pokeapi", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve(self):
+        """Serve requests on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def payload(self, key):
+        """Return the JSON payload for a resource key, or None if there is no such resource."""
+        if key in self.recordings:
+            # Recorded payloads link to the server they came from, point those links back at this one
+            base_url, payload = self.recordings[key]
+            return json.loads(json.dumps(payload).replace(base_url, self.base_url))
+
+        resource, _, name = key.partition("/")
+        if resource.startswith("pokemon?"):
+            return {
+                "count": len(self.catalogue),
+                "results": [{"name": name, "url": f"{self.base_url}pokemon/{name}/"} for name in self.catalogue.index],
+            }
+        if resource == "pokemon" and name in self.catalogue.index:
+            return self._pokemon(name, self.catalogue.loc[name])
+        if resource == "pokemon-species" and name in self.catalogue.index:
+            return self._species(name, self.catalogue.loc[name])
+        if resource == "evolution-chain" and name.isdigit():
+            return self._evolution_chain(int(name))
+        return None
+
+    def _pokemon(self, name, species):
+        return {
+            "id": int(species["number"]),
+            "name": name,
+            "height": int(species["height"]),
+            "weight": int(species["weight"]),
+            "species": {"name": name, "url": f"{self.base_url}pokemon-species/{name}/"},
+            "types": [{"slot": slot, "type": {"name": type_name.lower()}} for slot, type_name in enumerate(species["types"], 1)],
+            "stats": [{"base_stat": int(species[stat]), "stat": {"name": stat}} for stat in STAT_COLUMNS],
+            "sprites": {"front_default": f"{self.base_url}sprites/{int(species['number'])}.png"},
+        }
+
+    def _species(self, name, species):
+        return {
+            "id": int(species["number"]),
+            "name": name,
+            "is_legendary": bool(species["legendary"]),
+            "generation": {"name": species["generation"]},
+            "egg_groups": [{"name": group} for group in species["egg_groups"]],
+            "evolution_chain": {"url": f"{self.base_url}evolution-chain/{int(species['chain_id'])}/"},
+        }
+
+    def _evolution_chain(self, chain_id):
+        members = self.catalogue[self.catalogue["chain_id"] == chain_id].sort_values("stage")
+        if members.empty:
+            return None
+        # Chains are linear, each stage evolving into the next
+        node = None
+        for name in reversed(members.index):
+            node = {
+                "species": {"name": name, "url": f"{self.base_url}pokemon-species/{name}/"},
+                "evolves_to": [node] if node else [],
+            }
+        return {"id": chain_id, "chain": node}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if api.latency:
+                    time.sleep(api.latency)
+                api._count(requests=1)
+
+                if self.path.startswith(f"{API_PREFIX}sprites/"):
+                    self._send(200, SPRITE_PNG, "image/png")
+                    return
+
+                payload = api.payload(resource_key(self.path))
+                if payload is None:
+                    api._count(not_found=1)
+                    self._send(404, b"Not Found", "text/plain")
+                    return
+
+                body = json.dumps(payload).encode("utf-8")
+                etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    api._count(not_modified=1)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(200, body, "application/json", etag)
+
+            def _send(self, status, body, content_type, etag=None):
+                api._count(bytes=len(body))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for PokeAPI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering each request.")
+    parser.add_argument("--species", type=int, default=SPECIES_COUNT, help="Number of synthetic species to serve.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recordings", help="JSON lines file of recorded payloads to serve first.")
+    parser.add_argument("--record", metavar="OUTPUT", help="Record the app's cached responses to OUTPUT and exit.")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        print(f"Recorded {record_payloads(args.record)} payloads to {args.record}")
+        return
+
+    api = FakePokeAPI(args.species, args.seed, args.latency, args.recordings, args.host, args.port)
+    print(f"Serving fake PokeAPI at {api.base_url}")
+    api.serve()
+
+
+if __name__ == "__main__":
+    main()
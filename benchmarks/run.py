@@ -0,0 +1,245 @@
+"""Benchmark scenarios for loading, enrichment, analysis sections and charts.
+
+Team histories come from benchmarks/synthetic.py and every PokeAPI request goes
+to the local stand-in in benchmarks/fake_api.py, so runs never touch the network.
+Results are written as JSON lines, one per benchmark and size, and --baseline
+compares them with an earlier run, exiting non-zero on a regression:
+
+    python -m benchmarks.run --sizes 10,1000,100000 --output results.jsonl
+    python -m benchmarks.run --sizes 10000000 --scenarios load,analysis,charts
+    python -m benchmarks.run --latency 0.05 --scenarios enrich --baseline results.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from benchmarks.fake_api import FakePokeAPI
+from benchmarks.startup import compare
+from benchmarks.synthetic import SPECIES_COUNT, generate_teams
+
+SCENARIOS = ["load", "enrich", "analysis", "charts"]
+DEFAULT_SIZES = [10, 1000, 100000]
+
+
+def _timed(function, *args, repeat=1, setup=None):
+    """Call function repeat times and return the fastest time and the last result.
+
+    The app reports errors with print, e.g. sprites the fake PokeAPI's example
+    URLs cannot serve, so stdout is discarded while the function runs.
+    """
+    best, result = None, None
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = function(*args)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_load(data, repeat):
+    """Time saving and loading the team store, and the store write on its own.
+
+    save_data also rebuilds the aggregate counters, write_store is the same
+    Parquet or SQLite write without them.
+    """
+    from utils import data_manager, team_store
+    from utils.data_manager import load_data, save_data
+
+    def write_store():
+        if data_manager._use_sqlite():
+            team_store.replace_all(data_manager.SQLITE_FILE, data_manager.normalise_columns(data))
+        else:
+            data_manager._write_parquet(data, data_manager.DATA_FILE, data_manager.data_version() + 1)
+
+    save_seconds, _ = _timed(save_data, data, repeat=repeat)
+    write_seconds, _ = _timed(write_store, repeat=repeat)
+    load_seconds, _ = _timed(load_data, repeat=repeat)
+    return [("save_data", save_seconds, {}), ("write_store", write_seconds, {}), ("load_data", load_seconds, {})]
+
+
+def bench_enrich(rows, species, seed, api, repeat):
+    """Time enrichment against the fake PokeAPI, with a cold and then a warm response cache."""
+    from utils import api as pokeapi, cache, evolution
+    from utils.data_manager import enrich_data
+    data = generate_teams(rows, species, seed, enriched=False)
+
+    def forget():
+        pokeapi.clear_records()
+        evolution.clear()
+
+    def cold():
+        forget()
+        cache.clear_cache()
+
+    results = []
+    for name, setup in [("enrich_data_cold", cold), ("enrich_data_warm", forget)]:
+        requests_before = api.stats["requests"]
+        seconds, _ = _timed(enrich_data, data, repeat=repeat, setup=setup)
+        results.append((name, seconds, {"requests": (api.stats["requests"] - requests_before) // repeat}))
+    return results
+
+
+def bench_analysis(data, repeat):
+    """Time each analysis section's computation, as app.py runs it on a cache miss."""
+    import app
+    from utils.data_manager import STAT_COLUMNS
+    from utils.aggregates import AggregateStore
+    from utils.memo import fingerprint
+    results = []
+    store = AggregateStore("bench.aggregates.sqlite", STAT_COLUMNS)
+    seconds, _ = _timed(store.rebuild, data, 0, repeat=repeat)
+    results.append(("rebuild_aggregates", seconds, {}))
+    seconds, aggregates = _timed(store.read, repeat=repeat)
+    results.append(("read_aggregates", seconds, {}))
+    seconds, _ = _timed(fingerprint, data, repeat=repeat)
+    results.append(("fingerprint", seconds, {}))
+    seconds, valid_data = _timed(app.select_valid_data, data, repeat=repeat)
+    results.append(("select_valid_data", seconds, {}))
+
+    sections = [
+        ("compute_general", app.compute_general, (aggregates,)),
+        ("region_insights", lambda: app.generate_region_insights(aggregates.region_counts()), ()),
+        ("compute_type_coverage", app.compute_type_coverage, (valid_data,)),
+        ("compute_matchups", app.compute_matchups, (valid_data,)),
+        ("compute_stats", app.compute_stats, (valid_data, aggregates.stat_means(), aggregates.stat_stds())),
+        ("height_weight_insights", app.generate_height_weight_insights, (valid_data,)),
+        ("acquisition_counts", aggregates.acquisition_counts, ()),
+    ]
+    for name, function, args in sections:
+        seconds, _ = _timed(function, *args, repeat=repeat)
+        results.append((name, seconds, {}))
+    return results
+
+
+def bench_charts(data, repeat):
+    """Time every chart the app draws, rendering each one from scratch."""
+    import app
+    from utils import visualisation
+    from utils.distribution import DISTRIBUTION_CACHE
+    from utils.stats import TOTAL_COLUMN
+    from utils.data_manager import STAT_COLUMNS
+    from utils.aggregates import AggregateStore
+
+    valid_data = app.select_valid_data(data)
+    store = AggregateStore("bench.aggregates.sqlite", STAT_COLUMNS)
+    store.rebuild(data, 0)
+    aggregates = store.read()
+    type_counts, region_counts = aggregates.type_counts(), aggregates.region_counts()
+    matchups = app.compute_matchups(valid_data)
+    summary, _ = app.compute_stats(valid_data, aggregates.stat_means(), aggregates.stat_stds())
+    base_stats = summary.frame()
+    averages = aggregates.stat_means().reindex(STAT_COLUMNS)
+
+    charts = [
+        ("plot_pie_chart", visualisation.plot_pie_chart, (type_counts, "Type Distribution")),
+        ("plot_counts_bar", visualisation.plot_counts_bar, (type_counts, "Pokémon Counts by Type", "Type", "Count")),
+        ("plot_bar", visualisation.plot_bar, (region_counts, "Pokémon Counts by Region", "Region", "Count")),
+        ("plot_bar_matchups", visualisation.plot_bar, (matchups["exposed_teams"], "Teams Weak to Each Attacking Type", "Attacking Type", "Teams")),
+        ("plot_radar", visualisation.plot_radar, (averages.tolist(), list(averages.index), "Radar Chart of Average Base Stats")),
+        ("plot_average_bar", visualisation.plot_average_bar, (averages, "Average Base Stats Across Pokémon")),
+        ("plot_box", visualisation.plot_box, (summary, TOTAL_COLUMN, "Box Plot for Base Stat Totals", TOTAL_COLUMN)),
+        ("plot_histogram", visualisation.plot_histogram, (base_stats, TOTAL_COLUMN, "Distribution of Base Stat Totals", TOTAL_COLUMN)),
+        ("plot_kde", visualisation.plot_kde, (base_stats, TOTAL_COLUMN, "Distribution of Base Stat Totals", TOTAL_COLUMN)),
+        ("plot_scatter", visualisation.plot_scatter, (valid_data, "Height", "Weight", "Height vs Weight", "Height (m)", "Weight (kg)")),
+    ]
+
+    def cold():
+        visualisation.CHART_CACHE.clear()
+        DISTRIBUTION_CACHE.clear()
+
+    results = []
+    for name, function, args in charts:
+        seconds, _ = _timed(function, *args, repeat=repeat, setup=cold)
+        results.append((name, seconds, {}))
+    return results
+
+
+def _commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, scenarios=SCENARIOS, repeat=1, latency=0.0, species=SPECIES_COUNT, seed=0, recordings=None):
+    """Run the scenarios at every size in a scratch directory and return the results."""
+    from utils import api as pokeapi, cache
+
+    environment = {"commit": _commit(), "python": platform.python_version(), "latency": latency, "species": species}
+    results = []
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, FakePokeAPI(species, seed, latency, recordings) as api:
+        os.chdir(workdir)
+        cache.CACHE_FILE = os.path.join(workdir, "api_cache.sqlite")
+        pokeapi.API_BASE_URL = api.base_url
+        try:
+            for rows in sizes:
+                data = generate_teams(rows, species, seed)
+                for scenario in scenarios:
+                    if scenario == "load":
+                        timings = bench_load(data, repeat)
+                    elif scenario == "enrich":
+                        timings = bench_enrich(rows, species, seed, api, repeat)
+                    elif scenario == "analysis":
+                        timings = bench_analysis(data, repeat)
+                    else:
+                        timings = bench_charts(data, repeat)
+                    for name, seconds, extra in timings:
+                        result = {"benchmark": f"{scenario}:{name}@{rows}", "scenario": scenario, "name": name,
+                                  "rows": rows, "seconds": seconds, "repeat": repeat, **extra}
+                        print(json.dumps(result), file=sys.stderr)
+                        results.append(result)
+        finally:
+            os.chdir(previous_cwd)
+
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for result in results:
+        result.update(environment, timestamp=timestamp)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading, enrichment, analysis and charts on synthetic teams.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated row counts, e.g. 10,1000,10000000.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark, the fastest is kept.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake PokeAPI waits before each response.")
+    parser.add_argument("--species", type=int, default=SPECIES_COUNT, help="Number of synthetic species.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recordings", help="JSON lines file of recorded PokeAPI payloads to serve, see benchmarks/fake_api.py.")
+    parser.add_argument("--output", help="Append results to this JSON lines file.")
+    parser.add_argument("--baseline", help="JSON lines file from an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing, e.g. 0.25 for 25%%.")
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results = run(sizes, scenarios, args.repeat, args.latency, args.species, args.seed, args.recordings)
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(result) + "\n" for result in results)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Benchmark regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Import-time and first-paint benchmark for the Streamlit app.
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+cold-start costs. Results are written as JSON lines, and --baseline compares
+them with an earlier run, exiting non-zero on a regression:
+
+    python -m benchmarks.startup --output startup.jsonl
+    python -m benchmarks.startup --baseline startup.jsonl --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import cost is tracked, "app" covers everything on the app's import path
+IMPORT_TARGETS = ["utils.api", "utils.data_manager", "utils.visualisation", "app"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ("matplotlib", "seaborn", "plotly") if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+FIRST_PAINT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=300)
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "exceptions": len(at.exception)}}))
+"""
+
+
+def _run(script, cwd, env):
+    """Run a script in a fresh interpreter and return the dict it prints last."""
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat=3):
+    """Measure module import times and the app's first paint, keeping the best of each."""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Start from an empty data directory and never touch the network
+        env = dict(os.environ, POKEGAMEDEX_OFFLINE="1", PYTHONPATH=ROOT)
+        for module in IMPORT_TARGETS:
+            runs = [_run(IMPORT_SCRIPT.format(root=ROOT, module=module), workdir, env) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            results.append({"benchmark": f"import:{module}", "seconds": best["seconds"], "heavy_modules": best["heavy_modules"]})
+
+        runs = [_run(FIRST_PAINT_SCRIPT.format(app=os.path.join(ROOT, "app.py")), workdir, env) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run["seconds"])
+        results.append({"benchmark": "first_paint", "seconds": best["seconds"], "exceptions": best["exceptions"]})
+
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for result in results:
+        result["timestamp"] = timestamp
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Return the benchmarks that got slower than the baseline by more than tolerance."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {entry["benchmark"]: entry["seconds"] for entry in map(json.loads, f) if entry}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["benchmark"])
+        if previous and result["seconds"] > previous * (1 + tolerance):
+            regressions.append(f"{result['benchmark']}: {previous:.3f}s -> {result['seconds']:.3f}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app import time and first paint.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the fastest is kept.")
+    parser.add_argument("--output", help="Append results to this JSON lines file.")
+    parser.add_argument("--baseline", help="JSON lines file from an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing, e.g. 0.25 for 25%%.")
+    args = parser.parse_args(argv)
+
+    results = measure(repeat=args.repeat)
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(result) + "\n" for result in results)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Startup regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Synthetic Pokémon species and team histories for benchmarks.
+
+The same species catalogue backs both generate_teams and the fake PokeAPI
+server in benchmarks/fake_api.py, so enriching generated teams against the
+fake server produces the details generate_teams(enriched=True) fills in.
+"""
+import numpy as np
+import pandas as pd
+from utils.data_manager import COLUMN_TYPES, ENRICHMENT_VERSION, SCHEMA_VERSION, STAT_COLUMNS
+from utils.evolution import STARTER_BASE_FORMS
+from utils.type_chart import TYPES
+
+GAMES = [
+    "Red", "Blue", "Yellow", "Gold", "Silver", "Crystal", "Ruby", "Sapphire", "Emerald",
+    "FireRed", "LeafGreen", "Diamond", "Pearl", "Platinum", "HeartGold", "SoulSilver",
+    "Black", "White", "Black 2", "White 2", "X", "Y", "Omega Ruby", "Alpha Sapphire",
+    "Sun", "Moon", "Ultra Sun", "Ultra Moon", "Sword", "Shield", "Brilliant Diamond",
+    "Shining Pearl", "Legends: Arceus", "Scarlet", "Violet"
+]
+ACQUISITIONS = ["Caught", "Gifted", "Traded", "Hatched", "Other"]
+GENERATIONS = [
+    "generation-i", "generation-ii", "generation-iii", "generation-iv", "generation-v",
+    "generation-vi", "generation-vii", "generation-viii", "generation-ix"
+]
+EGG_GROUPS = ["monster", "water1", "bug", "flying", "field", "fairy", "grass", "mineral", "dragon", "undiscovered"]
+
+SPECIES_COUNT = 1000
+TEAM_SIZE = 6
+EMPTY_SLOT_RATE = 0.05  # Share of slots saved as "None" placeholders
+POPULARITY_SKEW = 1.1  # Zipf exponent, rosters favour a few popular species
+SPRITE_BASE_URL = "https://example.invalid/sprites/"
+
+
+def species_catalogue(count=SPECIES_COUNT, seed=0):
+    """Return count synthetic species as a DataFrame indexed by lower-case name.
+
+    The first evolution chains are named after the real starter base forms, so
+    starter detection has something to find.
+    """
+    rng = np.random.default_rng(seed)
+    numbers = np.arange(1, count + 1)
+
+    # Species form evolution chains of one to three consecutive numbers
+    chain_lengths = rng.integers(1, 4, size=count)
+    chain_starts = np.cumsum(np.r_[0, chain_lengths[:-1]])
+    chain_starts = chain_starts[chain_starts < count]
+    chain_ids = np.repeat(np.arange(1, len(chain_starts) + 1), np.diff(np.r_[chain_starts, count]))
+    stages = numbers - chain_starts[chain_ids - 1]
+
+    names = [f"synthmon{number:05d}" for number in numbers]
+    for start, starter in zip(chain_starts, sorted(STARTER_BASE_FORMS)):
+        names[start] = starter
+
+    first_types = rng.integers(0, len(TYPES), size=count)
+    second_types = np.where(rng.random(count) < 0.5, rng.integers(0, len(TYPES), size=count), -1)
+    second_types[second_types == first_types] = -1
+    types = [[TYPES[a]] + ([TYPES[b]] if b >= 0 else []) for a, b in zip(first_types, second_types)]
+
+    stats = np.clip(rng.normal(70, 25, size=(count, len(STAT_COLUMNS))) + 10 * stages[:, None], 5, 255).astype(int)
+    catalogue = pd.DataFrame({
+        "number": numbers,
+        "chain_id": chain_ids,
+        "stage": stages,
+        "types": types,
+        "height": rng.integers(2, 40, size=count) * stages,
+        "weight": rng.integers(10, 1000, size=count) * stages,
+        "legendary": rng.random(count) < 0.02,
+        "generation": [GENERATIONS[i] for i in rng.integers(0, len(GENERATIONS), size=count)],
+        "egg_groups": [[EGG_GROUPS[i]] for i in rng.integers(0, len(EGG_GROUPS), size=count)],
+    }, index=pd.Index(names, name="name"))
+    catalogue[STAT_COLUMNS] = stats
+    return catalogue
+
+
+def _lookup_table(values, placeholder):
+    """Return an object array of per-species values with the placeholder's value appended last."""
+    values = list(values) + [placeholder]
+    table = np.empty(len(values), dtype=object)
+    for position, value in enumerate(values):
+        table[position] = value  # Element by element, so lists are stored as objects
+    return table
+
+
+def generate_teams(rows, species=SPECIES_COUNT, seed=0, enriched=True):
+    """Generate a team history with the given number of rows, in the store's column layout.
+
+    With enriched=False only the columns the sidebar saves before enrichment are
+    filled in. Per-species values are built once and gathered by index, so 10M
+    rows take seconds rather than minutes.
+    """
+    rng = np.random.default_rng(seed)
+    catalogue = species_catalogue(species, seed)
+
+    # Teams of TEAM_SIZE slots, numbered per game in the order they were logged
+    teams = -(-rows // TEAM_SIZE)
+    team_games = rng.integers(0, len(GAMES), size=teams)
+    team_playthroughs = pd.Series(team_games).groupby(team_games).cumcount().to_numpy() + 1
+    team_of_row = np.arange(rows) // TEAM_SIZE
+
+    # Placeholder slots point one past the last species, at each table's placeholder value
+    popularity = rng.permutation(1 / np.arange(1, species + 1) ** POPULARITY_SKEW)
+    picks = rng.choice(species, size=rows, p=popularity / popularity.sum())
+    empty = rng.random(rows) < EMPTY_SLOT_RATE
+    slots = np.where(empty, species, picks)
+
+    # Columns are built with their stored dtypes, so the frame is never copied to convert them
+    names = _lookup_table((name.capitalize() for name in catalogue.index), "None")
+    acquisitions = np.array(ACQUISITIONS + ["N/A"], dtype=object)[np.where(empty, len(ACQUISITIONS), rng.integers(0, len(ACQUISITIONS), size=rows))]
+    columns = {
+        "Game": pd.array(np.array(GAMES, dtype=object)[team_games[team_of_row]], dtype=COLUMN_TYPES["Game"]),
+        "Playthrough": team_playthroughs[team_of_row],
+        "Pokemon": pd.array(names[slots], dtype=COLUMN_TYPES["Pokemon"]),
+        "Acquisition": pd.array(acquisitions, dtype=COLUMN_TYPES["Acquisition"]),
+    }
+    del team_of_row, acquisitions
+    if enriched:
+        starter_chains = set(catalogue.loc[catalogue.index.isin(STARTER_BASE_FORMS), "chain_id"])
+        starters = catalogue["chain_id"].isin(starter_chains).to_numpy()
+        columns.update({
+            "Sprite URL": pd.Series(_lookup_table((f"{SPRITE_BASE_URL}{number}.png" for number in catalogue["number"]), None)[slots], dtype=object),
+            "Region": pd.array(_lookup_table((generation.capitalize() for generation in catalogue["generation"]), None)[slots], dtype=COLUMN_TYPES["Region"]),
+            "Legendary": np.r_[catalogue["legendary"].to_numpy(), False][slots],
+            "Starter": np.r_[starters, False][slots],
+            "Evolution Stage": pd.arrays.IntegerArray(np.r_[catalogue["stage"].to_numpy(), 0][slots], empty),
+            "Egg Groups": _lookup_table(([group.capitalize() for group in groups] for groups in catalogue["egg_groups"]), [])[slots],
+            "Height": np.r_[catalogue["height"].to_numpy() / 10.0, np.nan][slots],
+            "Weight": np.r_[catalogue["weight"].to_numpy() / 10.0, np.nan][slots],
+        })
+        for stat in STAT_COLUMNS:
+            columns[stat] = pd.arrays.IntegerArray(np.r_[catalogue[stat].to_numpy(), 0][slots], np.zeros(rows, dtype=bool))
+        columns["Type"] = _lookup_table(catalogue["types"], [])[slots]
+    columns["Schema Version"] = np.full(rows, SCHEMA_VERSION, dtype=np.int64)
+    columns["Enrichment Version"] = np.full(rows, ENRICHMENT_VERSION if enriched else 0, dtype=np.int64)
+    return pd.DataFrame(columns, copy=False)
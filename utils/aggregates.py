@@ -0,0 +1,259 @@
+import os
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from utils.type_chart import TYPES, count_types, encode_types
+
+# Counter kinds kept per key, e.g. ("pokemon", "Pikachu") -> rows using Pikachu
+COUNTER_KINDS = ["pokemon", "type", "starter_type", "region", "acquisition", "stat_count", "stat_sum", "stat_squares"]
+
+# PRAGMA user_version of the current layout, 2: base stat counters
+AGGREGATES_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS counters (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS teams (
+    game TEXT NOT NULL,
+    playthrough INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    PRIMARY KEY (game, playthrough)
+) WITHOUT ROWID;
+"""
+
+
+def count_rows(rows, stat_columns):
+    """Count what the aggregates track over some team rows, as kind -> Counter.
+
+    Regions come from the "Region" column recorded during enrichment, rows
+    without one count as "Unknown". Each of stat_columns gets a count, sum and
+    sum of squares over the rows that have it. Row, valid row, starter and
+    legendary totals are returned under "total" and team row counts under
+    "team", keyed by (game, playthrough).
+    """
+    counts = {kind: Counter() for kind in COUNTER_KINDS + ["total", "team"]}
+    if rows.empty:
+        return counts
+    valid = rows[((rows["Pokemon"] != "None") & (rows["Acquisition"] != "N/A")).fillna(False).astype(bool)]
+
+    counts["total"].update(rows=len(rows), valid=len(valid))
+    teams = rows.groupby(["Game", "Playthrough"], sort=False, observed=True).size()
+    counts["team"].update({(str(game), int(playthrough)): int(size) for (game, playthrough), size in teams.items()})
+    regions = valid["Region"].astype(object).fillna("Unknown") if "Region" in valid.columns else pd.Series("Unknown", index=valid.index)
+    for kind, values in [("pokemon", valid["Pokemon"]), ("region", regions), ("acquisition", valid["Acquisition"])]:
+        values = values.value_counts()
+        counts[kind].update({str(key): int(value) for key, value in values[values > 0].items()})
+
+    starters = valid["Starter"].to_numpy(dtype=bool) if "Starter" in valid.columns else np.zeros(len(valid), dtype=bool)
+    counts["total"].update(starters=int(starters.sum()))
+    if "Legendary" in valid.columns:
+        counts["total"].update(legendaries=int(valid["Legendary"].to_numpy(dtype=bool).sum()))
+    if "Type" in valid.columns:
+        masks = encode_types(valid)
+        counts["type"].update({name: int(value) for name, value in count_types(masks).items()})
+        counts["starter_type"].update({name: int(value) for name, value in count_types(masks[starters]).items()})
+
+    for stat in stat_columns:
+        if stat in valid.columns:
+            values = pd.to_numeric(valid[stat], errors="coerce").dropna().to_numpy(dtype=np.int64)
+            counts["stat_count"][stat] = len(values)
+            counts["stat_sum"][stat] = int(values.sum())
+            counts["stat_squares"][stat] = int((values * values).sum())
+    return counts
+
+
+def _count_all(data, stat_columns):
+    """Count every row of a team store, with the playthrough and game totals."""
+    counts = count_rows(data, stat_columns)
+    teams = counts["team"]
+    counts["total"].update(playthroughs=len(teams), games=len({game for game, _ in teams}))
+    return counts
+
+
+def count_aggregates(data, stat_columns):
+    """Count the aggregates of some team data in memory, stamped with the store version it was loaded at."""
+    counts = _count_all(data, stat_columns)
+    counters = {kind: {str(key): value for key, value in counts[kind].items() if value} for kind in COUNTER_KINDS + ["total"]}
+    return Aggregates(counters, data.attrs.get("store_version"))
+
+
+class Aggregates:
+    """A snapshot of the aggregate counters, answering the dashboard's headline numbers without the rows."""
+
+    def __init__(self, counters, store_version):
+        self.counters = counters  # kind -> {key: value}
+        self.store_version = store_version
+
+    def total(self, name):
+        return self.counters.get("total", {}).get(name, 0)
+
+    def _series(self, kind, name, index_name):
+        values = self.counters.get(kind, {})
+        series = pd.Series(values, name=name, dtype="int64")
+        series.index.name = index_name
+        return series.sort_values(ascending=False, kind="stable")
+
+    def pokemon_counts(self, limit=None):
+        """Return how often each Pokémon was used, most common first."""
+        counts = self._series("pokemon", "count", "Pokemon")
+        return counts if limit is None else counts.head(limit)
+
+    def type_counts(self, starters=False):
+        """Return how often each type appears, most common first, in the order count_types returns them."""
+        values = self.counters.get("starter_type" if starters else "type", {})
+        counts = pd.Series([values.get(name, 0) for name in TYPES], index=pd.Index(TYPES, name="Type"), name="count")
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    def region_counts(self):
+        return self._series("region", "count", "Region")
+
+    def acquisition_counts(self):
+        return self._series("acquisition", "count", "Acquisition")
+
+    def stat_means(self):
+        """Return the mean of each base stat over the rows that have it."""
+        counts = pd.Series(self.counters.get("stat_count", {}), dtype="float64")
+        return pd.Series(self.counters.get("stat_sum", {}), dtype="float64").reindex(counts.index) / counts.replace(0, np.nan)
+
+    def stat_stds(self):
+        """Return the sample standard deviation of each base stat, from its sum and sum of squares."""
+        counts = pd.Series(self.counters.get("stat_count", {}), dtype="float64")
+        sums = pd.Series(self.counters.get("stat_sum", {}), dtype="float64").reindex(counts.index)
+        squares = pd.Series(self.counters.get("stat_squares", {}), dtype="float64").reindex(counts.index)
+        variance = (squares - sums * sums / counts) / (counts - 1).where(counts > 1)
+        return np.sqrt(variance.clip(lower=0))
+
+
+class AggregateStore:
+    """Aggregate counters kept in SQLite next to a team store, updated one team at a time.
+
+    The store is stamped with the team store version it reflects, so a reader
+    can tell when a write was missed and the counters must be rebuilt.
+    """
+
+    def __init__(self, path, stat_columns):
+        self.path = path
+        self.stat_columns = list(stat_columns)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if user_version == 0:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA + f"PRAGMA user_version = {AGGREGATES_VERSION};")
+        elif user_version < AGGREGATES_VERSION:
+            # Counters from an older layout lack kinds added since, drop the stamp so they are rebuilt on next read
+            conn.executescript(f"DELETE FROM meta; PRAGMA user_version = {AGGREGATES_VERSION};")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _stamp(conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'store_version'").fetchone()
+        return row[0] if row else None
+
+    def _apply_counters(self, conn, counts, sign):
+        changes = [(kind, str(key), sign * value) for kind in COUNTER_KINDS + ["total"]
+                   for key, value in counts[kind].items() if value]
+        conn.executemany(
+            "INSERT INTO counters VALUES (?, ?, ?) ON CONFLICT (kind, key) DO UPDATE SET value = value + excluded.value",
+            changes,
+        )
+        conn.executemany("DELETE FROM counters WHERE kind = ? AND key = ? AND value = 0", [change[:2] for change in changes])
+
+    def _apply_teams(self, conn, teams, totals, sign):
+        """Add or subtract team row counts, keeping the playthrough and game totals in step."""
+        for (game, playthrough), size in teams.items():
+            row = conn.execute("SELECT rows FROM teams WHERE game = ? AND playthrough = ?", (game, playthrough)).fetchone()
+            before = row[0] if row else 0
+            after = before + sign * size
+            game_had_teams = conn.execute("SELECT EXISTS (SELECT 1 FROM teams WHERE game = ?)", (game,)).fetchone()[0]
+            if after > 0:
+                conn.execute("INSERT OR REPLACE INTO teams VALUES (?, ?, ?)", (game, playthrough, after))
+            else:
+                conn.execute("DELETE FROM teams WHERE game = ? AND playthrough = ?", (game, playthrough))
+            if (before > 0) != (after > 0):
+                game_has_teams = conn.execute("SELECT EXISTS (SELECT 1 FROM teams WHERE game = ?)", (game,)).fetchone()[0]
+                # Totals are applied with the rows' sign, so a removed playthrough counts as 1 here too
+                totals["playthroughs"] += 1
+                totals["games"] += sign * (game_has_teams - game_had_teams)
+
+    def rebuild(self, data, store_version):
+        """Recount everything from the full team data, stamping the counters with its store version."""
+        counts = _count_all(data, self.stat_columns)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM teams")
+            conn.executemany("INSERT INTO teams VALUES (?, ?, ?)", [(game, playthrough, size) for (game, playthrough), size in counts["team"].items()])
+            self._apply_counters(conn, counts, 1)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('store_version', ?)", (store_version,))
+
+    def update(self, rows, sign, before, after):
+        """Add (sign=1) or subtract (sign=-1) one write's rows, if the counters reflected the store just before it.
+
+        Returns False, leaving the counters stale, when they had fallen behind or
+        another write landed in between, see data_manager.load_aggregates.
+        """
+        if after != before + 1:
+            return False
+        counts = count_rows(rows, self.stat_columns)
+        with self._transaction() as conn:
+            if self._stamp(conn) != before:
+                return False
+            totals = Counter()
+            self._apply_teams(conn, counts["team"], totals, sign)
+            counts["total"].update(totals)
+            self._apply_counters(conn, counts, sign)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('store_version', ?)", (after,))
+        return True
+
+    def read(self):
+        """Return a snapshot of every counter, or None if the store has never been built."""
+        if not os.path.exists(self.path):
+            return None
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            store_version = self._stamp(conn)
+            rows = conn.execute("SELECT kind, key, value FROM counters").fetchall()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if store_version is None:
+            return None
+        counters = {}
+        for kind, key, value in rows:
+            counters.setdefault(kind, {})[key] = value
+        return Aggregates(counters, store_version)
+
+    def clear(self):
+        """Remove the aggregate database, so it is rebuilt on next read."""
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
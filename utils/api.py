@@ -1,35 +1,173 @@
+import os
+import threading
+from concurrent.futures import Future
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils import cache, evolution
+from utils.perf import count, span
 
-API_BASE_URL = "https://pokeapi.co/api/v2/"
+API_BASE_URL = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2/")
+
+# Local Pokédex snapshot used instead of the network when set, see utils/snapshot.py
+SNAPSHOT_FILE = os.environ.get("POKEGAMEDEX_SNAPSHOT")
+
+# HTTP client settings
+CONNECT_TIMEOUT = 3.05  # Seconds to establish a connection
+READ_TIMEOUT = 10  # Seconds to wait for response data
+POOL_CONNECTIONS = 4  # Number of hosts to keep connection pools for
+POOL_MAXSIZE = 16  # Connections kept alive per host
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # Waits 0.5s, 1s, 2s, ... between retries
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Resolved Pokémon records and lookups currently in flight, keyed by lowercase name
+_records = {}
+_inflight = {}
+_records_lock = threading.Lock()
+
+_snapshot = None
+_snapshot_loaded = False
+
+# Columns returned by get_pokemon_details
+DETAIL_FIELDS = (
+    "Sprite URL", "Region", "Legendary", "Starter", "Evolution Stage", "Egg Groups",
+    "Height", "Weight", "Base Stats", "Type"
+)
+
+
+class FetchError(RuntimeError):
+    """Raised when a resource could not be fetched, as opposed to PokeAPI not having it."""
+
+
+def create_session(pool_connections=None, pool_maxsize=None, max_retries=None, backoff_factor=None):
+    """Create a requests session with connection pooling and a retry policy."""
+    retry = Retry(
+        total=MAX_RETRIES if max_retries is None else max_retries,
+        connect=MAX_RETRIES if max_retries is None else max_retries,
+        read=MAX_RETRIES if max_retries is None else max_retries,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS if pool_connections is None else pool_connections,
+        pool_maxsize=POOL_MAXSIZE if pool_maxsize is None else pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+def get_session():
+    """Return the shared HTTP session used by every API call."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def configure_session(**kwargs):
+    """Replace the shared session, e.g. to size the per-host pool for concurrent enrichment."""
+    global _session
+    with _session_lock:
+        previous, _session = _session, create_session(**kwargs)
+    if previous is not None:
+        previous.close()
+
+def fetch_json(url):
+    """Fetch a PokeAPI resource as JSON, serving it from the response cache when possible.
+
+    Returns None if PokeAPI answers 404, and raises FetchError if the resource
+    could not be fetched at all, e.g. offline or on a persistent server error.
+    """
+    url = cache.normalise_url(url)
+    entry = cache.get_entry(url)
+    if entry is not None and (entry["fresh"] or cache.is_offline()):
+        count("responses.hits")
+        return entry["payload"]
+    count("responses.misses")
+    if cache.is_offline():
+        raise FetchError(f"{url} is not cached and the app is offline")
+
+    # Revalidate stale entries with a conditional request
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with span("http", url=url):
+            response = get_session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    except requests.RequestException:
+        count("http.errors")
+        if entry is not None:
+            return entry["payload"]  # Serve stale data rather than nothing
+        raise
+
+    retries = getattr(response.raw, "retries", None)
+    count("http.requests")
+    count("http.bytes", len(response.content))
+    count("http.retries", len(retries.history) if retries is not None else 0)
+
+    if response.status_code == 304 and entry is not None:
+        count("http.not_modified")
+        cache.touch_entry(url)
+        return entry["payload"]
+    if response.status_code != 200:
+        if entry is not None:
+            return entry["payload"]  # Serve stale data rather than nothing
+        if response.status_code == 404:
+            return None
+        raise FetchError(f"{url} returned HTTP {response.status_code}")
+
+    payload = response.json()
+    cache.put_entry(url, payload, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return payload
+
+def use_snapshot(path):
+    """Answer every lookup from a local snapshot file, or go back to PokeAPI if path is None."""
+    global _snapshot, _snapshot_loaded
+    from utils.snapshot import read_snapshot
+
+    _snapshot = read_snapshot(path) if path else None
+    _snapshot_loaded = True
+    with _records_lock:
+        _records.clear()
+
+def get_snapshot():
+    """Return the active snapshot, loading SNAPSHOT_FILE on first use, or None in network mode."""
+    if not _snapshot_loaded and SNAPSHOT_FILE:
+        try:
+            use_snapshot(SNAPSHOT_FILE)
+        except Exception as e:
+            print(f"Error loading Pokédex snapshot {SNAPSHOT_FILE}: {e}")
+            use_snapshot(None)
+    return _snapshot
 
 def get_pokemon_names(limit=1000):
     """Fetch a list of Pokémon names from PokeAPI."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot["names"][:limit]
+
     try:
-        response = requests.get(f"{API_BASE_URL}pokemon?limit={limit}")
-        if response.status_code == 200:
-            pokemon_list = response.json()["results"]
+        pokemon_data = fetch_json(f"{API_BASE_URL}pokemon?limit={limit}")
+        if pokemon_data is not None:
+            pokemon_list = pokemon_data["results"]
             return [pokemon["name"].capitalize() for pokemon in pokemon_list]
     except Exception as e:
         print(f"Error fetching Pokémon names: {e}")
 
-def get_pokemon_region(pokemon_name):
-    """Fetch the region for a specific Pokémon."""
-    try:
-        # Normalize the Pokémon name
-        normalized_name = normalize_pokemon_name(pokemon_name)
-
-        # Query the Pokémon species endpoint
-        species_url = f"{API_BASE_URL}pokemon-species/{normalized_name}"
-        response = requests.get(species_url)
-        if response.status_code == 200:
-            species_data = response.json()
-            region = species_data.get("generation", {}).get("name", "Unknown")
-            return region.capitalize()
-    except Exception as e:
-        print(f"Error fetching region for Pokémon {pokemon_name}: {e}")
-    return "Unknown"
-
-
 def normalize_pokemon_name(name):
     """Normalize Pokémon names to match the API's naming conventions."""
     # Handle specific cases where forms or descriptors are appended
@@ -42,96 +180,137 @@ def normalize_pokemon_name(name):
     normalized_name = form_mappings.get(name.lower(), name.lower())
     return normalized_name
 
+def resolve_pokemon(pokemon_name):
+    """Resolve a Pokémon into one record built from its pokemon, species and evolution-chain resources.
+
+    Each resource is fetched at most once per name, and concurrent lookups of the
+    same name wait for the request already in flight. Returns None if nothing is found.
+    """
+    key = pokemon_name.lower()
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot["records"].get(key)
+
+    with _records_lock:
+        if key in _records:
+            return _records[key]
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    if not owner:
+        return future.result()
+
+    try:
+        record = _fetch_record(key)
+    except Exception as e:
+        with _records_lock:
+            del _inflight[key]
+        future.set_exception(e)
+        raise
+
+    with _records_lock:
+        if record is not None:
+            _records[key] = record
+        del _inflight[key]
+    future.set_result(record)
+    return record
+
+def clear_records():
+    """Forget every resolved record, so later lookups go back to the response cache or the network."""
+    with _records_lock:
+        _records.clear()
+
+def _fetch_record(name):
+    """Fetch the resources for a Pokémon and build its record."""
+    pokemon_data = fetch_json(f"{API_BASE_URL}pokemon/{name}")
+
+    # Fetch species details for additional info
+    if pokemon_data is not None:
+        species_data = fetch_json(pokemon_data["species"]["url"])
+    else:
+        species_data = fetch_json(f"{API_BASE_URL}pokemon-species/{normalize_pokemon_name(name)}")
+    if pokemon_data is None and species_data is None:
+        return None
+    species_data = species_data or {}
+
+    # Fetch the evolution chain, unless another member of it has already been indexed
+    evolution_chain_data = None
+    if species_data.get("name") is None or evolution.lookup(species_data["name"]) is None:
+        evolution_chain_url = species_data.get("evolution_chain", {}).get("url")
+        evolution_chain_data = fetch_json(evolution_chain_url) if evolution_chain_url else None
+
+    return build_record(pokemon_data, species_data, evolution_chain_data)
+
+def build_record(pokemon_data, species_data, evolution_chain_data):
+    """Build a Pokémon record from raw pokemon, species and evolution-chain payloads.
+
+    The evolution chain may be None if the species is already in the evolution index.
+    """
+    if evolution_chain_data:
+        evolution.index_chain(evolution_chain_data)
+    species_name = species_data.get("name") or (pokemon_data or {}).get("species", {}).get("name", "")
+    chain_entry = evolution.lookup(species_name) if species_name else None
+
+    record = {
+        "Found": pokemon_data is not None,
+        "Region": species_data.get("generation", {}).get("name", "Unknown").capitalize(),
+        "Legendary": species_data.get("is_legendary", False),
+        "Starter": chain_entry["starter"] if chain_entry else False,
+        "Evolution Stage": chain_entry["stage"] if chain_entry else 1,
+        "Egg Groups": [group["name"].capitalize() for group in species_data.get("egg_groups", [])],
+    }
+    if pokemon_data is None:
+        return record
+
+    record.update({
+        "Sprite URL": pokemon_data["sprites"]["front_default"],  # Fetch default sprite URL
+        "Height": pokemon_data["height"] / 10.0,  # Convert decimetres to metres
+        "Weight": pokemon_data["weight"] / 10.0,  # Convert hectograms to kilograms
+        "Base Stats": {stat["stat"]["name"]: stat["base_stat"] for stat in pokemon_data["stats"]},
+        "Type": [type_info["type"]["name"].capitalize() for type_info in pokemon_data["types"]],
+    })
+    return record
+
+def get_pokemon_region(pokemon_name):
+    """Fetch the region for a specific Pokémon."""
+    try:
+        record = resolve_pokemon(pokemon_name)
+        if record is not None:
+            return record["Region"]
+    except Exception as e:
+        print(f"Error fetching region for Pokémon {pokemon_name}: {e}")
+    return "Unknown"
+
 def get_pokemon_details(pokemon_name):
-    """Fetch detailed Pokémon attributes, including base stats."""
+    """Fetch detailed Pokémon attributes, including base stats.
+
+    Returns {} if PokeAPI does not know the Pokémon, and {"Type": []} if it
+    could not be looked up, so callers can retry it later.
+    """
     try:
-        # Normalize the Pokémon name
-        normal_name = normalize_pokemon_name(pokemon_name);
-        # Fetch Pokémon data
-        response = requests.get(f"{API_BASE_URL}pokemon/{pokemon_name.lower()}")
-        if response.status_code != 200:
+        record = resolve_pokemon(pokemon_name)
+        if record is None and get_snapshot() is not None:
+            # Missing from the snapshot, which may predate the Pokémon, rather than known not to exist
+            return {"Type": []}
+        if record is None or not record["Found"]:
             return {}
-
-        pokemon_data = response.json()
-
-        # Fetch species details for additional info
-        species_response = requests.get(pokemon_data["species"]["url"])
-        species_data = species_response.json() if species_response.status_code == 200 else {}
-
-        # Parse relevant attributes
-        legendary = species_data.get("is_legendary", False)
-        starter = is_starter_pokemon(pokemon_name)
-        evolution_stage = 1  # Assume basic, adjust logic for detailed evolution chains
-        egg_groups = [group["name"].capitalize() for group in species_data.get("egg_groups", [])]
-        height = pokemon_data["height"] / 10.0  # Convert decimetres to metres
-        weight = pokemon_data["weight"] / 10.0  # Convert hectograms to kilograms
-
-        types = [type_info["type"]["name"].capitalize() for type_info in pokemon_data["types"]]
-
-        # Parse base stats
-        base_stats = {stat["stat"]["name"]: stat["base_stat"] for stat in pokemon_data["stats"]}
-
-        sprite_url = pokemon_data["sprites"]["front_default"]  # Fetch default sprite URL
-
-        return {
-            "Sprite URL": sprite_url,
-            "Legendary": legendary,
-            "Starter": starter,
-            "Evolution Stage": evolution_stage,
-            "Egg Groups": egg_groups,
-            "Height": height,
-            "Weight": weight,
-            "Base Stats": base_stats,
-            "Type": types
-        }
+        return {field: record[field] for field in DETAIL_FIELDS}
     except Exception as e:
         print(f"Error fetching Pokémon details for {pokemon_name}: {e}")
         return {"Type": []}  # Return an empty list for missing types
 
 def is_starter_pokemon(pokemon_name):
     """Determine if a Pokémon is part of a starter evolutionary line."""
-    try:
-        # Normalize the Pokémon name
-        normalized_name = normalize_pokemon_name(pokemon_name)
+    # Answer from the evolution index without any HTTP once the chain is known
+    starter = evolution.is_starter(normalize_pokemon_name(pokemon_name))
+    if starter is not None:
+        return starter
 
-        # Fetch Pokémon species details
-        species_response = requests.get(f"{API_BASE_URL}pokemon-species/{normalized_name}")
-        if species_response.status_code != 200:
-            return False
-        species_data = species_response.json()
-
-        # Fetch the evolution chain
-        evolution_chain_url = species_data.get("evolution_chain", {}).get("url")
-        if not evolution_chain_url:
-            return False
-        evolution_chain_response = requests.get(evolution_chain_url)
-        if evolution_chain_response.status_code != 200:
-            return False
-        evolution_chain_data = evolution_chain_response.json()
-
-        # Known starter base forms
-        starters = {
-            "bulbasaur", "charmander", "squirtle",  # Gen 1
-            "chikorita", "cyndaquil", "totodile",  # Gen 2
-            "treecko", "torchic", "mudkip",        # Gen 3
-            "turtwig", "chimchar", "piplup",       # Gen 4
-            "snivy", "tepig", "oshawott",         # Gen 5
-            "chespin", "fennekin", "froakie",     # Gen 6
-            "rowlet", "litten", "popplio",        # Gen 7
-            "grookey", "scorbunny", "sobble",     # Gen 8
-            "eevee", "pikachu"                    # Let's Go
-        }
-
-        # Traverse the evolution chain to find all forms
-        current = evolution_chain_data["chain"]
-        all_forms = []
-        while current:
-            all_forms.append(current["species"]["name"])
-            current = current["evolves_to"][0] if current["evolves_to"] else None
-
-        # Check if any form in the chain is a known starter
-        return any(form in starters for form in all_forms)
+    try:
+        record = resolve_pokemon(pokemon_name)
+        return record is not None and record["Starter"]
     except Exception as e:
         print(f"Error determining starter status for {pokemon_name}: {e}")
         return False
-
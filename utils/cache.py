@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CACHE_FILE = os.environ.get("POKEGAMEDEX_CACHE_FILE", "data/api_cache.sqlite")
+
+# Bounds for the on-disk cache, the least recently used entries are evicted first
+CACHE_MAX_ENTRIES = 20000
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Reads refresh an entry's last access time at most this often, so cache hits rarely write
+ACCESS_UPDATE_INTERVAL = 60 * 60
+# Puts between checks of the entry and size bounds, the cache may exceed them by this many entries in between
+EVICT_CHECK_INTERVAL = 100
+
+DAY = 24 * 60 * 60
+
+# Time-to-live per PokeAPI resource, keyed by the first path segment after /api/v2/
+RESOURCE_TTLS = {
+    "pokemon": 30 * DAY,
+    "pokemon-species": 30 * DAY,
+    "evolution-chain": 90 * DAY,
+    "list": 1 * DAY,  # Paginated listings such as pokemon?limit=1000
+}
+DEFAULT_TTL = 7 * DAY
+
+_offline = os.environ.get("POKEGAMEDEX_OFFLINE", "").lower() in ("1", "true", "yes")
+_local = threading.local()
+_puts_since_evict = 0
+_evict_lock = threading.Lock()
+
+
+def set_offline(offline=True):
+    """Enable or disable strict offline mode, in which only cached entries are served."""
+    global _offline
+    _offline = bool(offline)
+
+
+def is_offline():
+    """Return True when the cache is in strict offline mode."""
+    return _offline
+
+
+def normalise_url(url):
+    """Normalise a URL so equivalent requests share a single cache key."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/").lower() or "/"
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def resource_ttl(url):
+    """Return the time-to-live in seconds for the resource a URL points at."""
+    parts = urlsplit(url)
+    if parts.query:
+        return RESOURCE_TTLS["list"]
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if "v2" in segments and segments.index("v2") + 1 < len(segments):
+        resource = segments[segments.index("v2") + 1]
+        return RESOURCE_TTLS.get(resource, DEFAULT_TTL)
+    return DEFAULT_TTL
+
+
+def _connection():
+    """Return this thread's connection to the cache database, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == CACHE_FILE:
+        return conn
+
+    directory = os.path.dirname(CACHE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(CACHE_FILE, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+    conn.commit()
+    _local.conn = conn
+    _local.path = CACHE_FILE
+    return conn
+
+
+def get_entry(url):
+    """Return the cached entry for a URL as a dict, or None if it has never been stored."""
+    url = normalise_url(url)
+    conn = _connection()
+    row = conn.execute(
+        "SELECT payload, etag, last_modified, fetched_at, expires_at, accessed_at FROM responses WHERE url = ?",
+        (url,),
+    ).fetchone()
+    if row is None:
+        return None
+
+    payload, etag, last_modified, fetched_at, expires_at, accessed_at = row
+    now = time.time()
+    if now - accessed_at > ACCESS_UPDATE_INTERVAL:
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+        conn.commit()
+    return {
+        "payload": json.loads(zlib.decompress(payload)),
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": fetched_at,
+        "expires_at": expires_at,
+        "fresh": expires_at > time.time(),
+    }
+
+
+def put_entry(url, payload, etag=None, last_modified=None):
+    """Store a JSON payload for a URL and evict old entries if the cache is over its bounds."""
+    url = normalise_url(url)
+    blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    now = time.time()
+    conn = _connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (url, blob, len(blob), etag, last_modified, now, now + resource_ttl(url), now),
+    )
+    conn.commit()
+
+    global _puts_since_evict
+    with _evict_lock:
+        _puts_since_evict += 1
+        due = _puts_since_evict >= EVICT_CHECK_INTERVAL
+        if due:
+            _puts_since_evict = 0
+    if due:
+        evict()
+
+
+def touch_entry(url):
+    """Mark a cached entry as revalidated, extending its expiry by the resource TTL."""
+    url = normalise_url(url)
+    now = time.time()
+    conn = _connection()
+    conn.execute(
+        "UPDATE responses SET fetched_at = ?, expires_at = ?, accessed_at = ? WHERE url = ?",
+        (now, now + resource_ttl(url), now, url),
+    )
+    conn.commit()
+
+
+def evict(max_entries=None, max_bytes=None):
+    """Remove the least recently used entries until the cache fits its entry and size bounds."""
+    max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    conn = _connection()
+    count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+    if count <= max_entries and total <= max_bytes:
+        return 0
+
+    removed = 0
+    rows = conn.execute("SELECT url, size FROM responses ORDER BY accessed_at ASC")
+    stale = []
+    for url, size in rows:
+        if count <= max_entries and total <= max_bytes:
+            break
+        stale.append((url,))
+        count -= 1
+        total -= size
+        removed += 1
+    conn.executemany("DELETE FROM responses WHERE url = ?", stale)
+    conn.commit()
+    return removed
+
+
+def clear_cache():
+    """Remove every cached response."""
+    conn = _connection()
+    conn.execute("DELETE FROM responses")
+    conn.commit()
+
+
+def iter_entries():
+    """Yield (url, payload) for every cached response, e.g. to record payloads for a local stand-in."""
+    conn = _connection()
+    for url, payload in conn.execute("SELECT url, payload FROM responses ORDER BY url").fetchall():
+        yield url, json.loads(zlib.decompress(payload))
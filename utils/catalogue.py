@@ -0,0 +1,112 @@
+import bisect
+import difflib
+import os
+import threading
+import time
+from utils.api import get_pokemon_names
+from utils.perf import bind_run
+
+# Names from the last successful fetch, used when PokeAPI is unreachable
+NAMES_FILE = "data/pokemon_names.txt"
+
+# Seconds before retrying when no names could be loaded at all
+EMPTY_RETRY_AFTER = 60
+
+_catalogue = None
+_loaded_at = 0
+_lock = threading.Lock()
+
+
+class NameCatalogue:
+    """Pokémon names with O(1) position lookup and prefix and fuzzy search."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self._lower = {name.lower(): name for name in self.names}
+        self._sorted = sorted(self._lower)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def position(self, name):
+        """Return a name's position in the catalogue, or None if it is not listed."""
+        return self.positions.get(name)
+
+    def search(self, query, limit=10):
+        """Return names starting with query, or the closest matches if none do."""
+        query = query.strip().lower()
+        if not query:
+            return self.names[:limit]
+
+        matches = []
+        start = bisect.bisect_left(self._sorted, query)
+        for lower in self._sorted[start:]:
+            if not lower.startswith(query) or len(matches) >= limit:
+                break
+            matches.append(self._lower[lower])
+        if matches:
+            return matches
+        return [self._lower[lower] for lower in difflib.get_close_matches(query, self._sorted, n=limit, cutoff=0.6)]
+
+
+def _read_names_file():
+    if not os.path.exists(NAMES_FILE):
+        return []
+    with open(NAMES_FILE, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _write_names_file(names):
+    directory = os.path.dirname(NAMES_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{NAMES_FILE}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(names) + "\n")
+    os.replace(temp_path, NAMES_FILE)
+
+
+def load_names():
+    """Fetch Pokémon names, falling back to the names saved by the last successful fetch."""
+    names = get_pokemon_names()
+    if names:
+        if names != _read_names_file():
+            _write_names_file(names)
+        return names
+    return _read_names_file()
+
+
+def _needs_load():
+    return _catalogue is None or (not _catalogue and time.time() - _loaded_at > EMPTY_RETRY_AFTER)
+
+
+def get_catalogue(block=True):
+    """Return the name catalogue, loading it on first use and sharing it across sessions.
+
+    With block=False, never loads on the caller's thread: starts the load in the
+    background and returns the names saved by the last fetch until it finishes.
+    """
+    if _needs_load():
+        if not block:
+            preload_catalogue()
+            return _catalogue if _catalogue is not None else NameCatalogue(_read_names_file())
+        with _lock:
+            if _needs_load():
+                _set_catalogue(NameCatalogue(load_names()))
+    return _catalogue
+
+
+def preload_catalogue():
+    """Start loading the catalogue in the background so the first script run does not wait on it."""
+    if _needs_load() and not _lock.locked():
+        threading.Thread(target=bind_run(get_catalogue), name="catalogue-preload", daemon=True).start()
+
+
+def _set_catalogue(catalogue):
+    global _catalogue, _loaded_at
+    _catalogue = catalogue
+    _loaded_at = time.time()
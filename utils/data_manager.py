@@ -1,53 +1,462 @@
+import ast
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import team_store
+from utils.aggregates import AggregateStore, count_aggregates
 from utils.api import get_pokemon_details
-DATA_FILE = "data/teams.csv"
-
-def enrich_data(data):
-    """Enrich the dataset with additional Pokémon details."""
-    enriched_rows = []
-    for _, row in data.iterrows():
-        # Skip rows where Pokémon is 'None'
-        if row["Pokemon"] == "None":
-            enriched_rows.append(row)
+from utils.memo import fingerprint
+from utils.perf import bind_run, span, timed
+from utils.team_store import StaleDataError
+
+try:
+    import fcntl
+except ImportError:  # Windows, fall back to locking within this process only
+    fcntl = None
+
+DATA_FILE = "data/teams.parquet"
+LEGACY_DATA_FILE = "data/teams.csv"  # Migrated to DATA_FILE on first load
+
+# Set POKEGAMEDEX_STORE=sqlite to keep teams in an indexed SQLite database instead of DATA_FILE
+STORE_BACKEND = os.environ.get("POKEGAMEDEX_STORE", "parquet")
+SQLITE_FILE = "data/teams.sqlite"
+
+# Set POKEGAMEDEX_PARTITION_BY_USER=1 to give each user their own store under USER_DATA_DIR
+PARTITION_BY_USER = os.environ.get("POKEGAMEDEX_PARTITION_BY_USER", "").lower() in ("1", "true", "yes")
+USER_DATA_DIR = "data/users"
+
+VERSION_KEY = b"pokegamedex_version"  # Parquet metadata key holding the store version
+
+# Aggregate counters are kept next to each store, in a file named after it with this suffix
+AGGREGATES_SUFFIX = ".aggregates.sqlite"
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+# Maximum number of Pokémon fetched concurrently during enrichment
+ENRICH_WORKERS = 8
+
+# Bump SCHEMA_VERSION when the row layout changes and ENRICHMENT_VERSION when
+# the details fetched from PokeAPI change, so affected rows are re-enriched
+SCHEMA_VERSION = 2
+ENRICHMENT_VERSION = 3  # 2: real evolution stages, 3: region
+
+REQUIRED_COLUMNS = ["Game", "Playthrough", "Pokemon", "Acquisition"]
+STAT_COLUMNS = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+LIST_COLUMNS = ["Type", "Egg Groups"]
+
+# Stored column types, "Base Stats" from the API is split into the STAT_COLUMNS
+COLUMN_TYPES = {
+    "Game": "string",
+    "Playthrough": "int64",
+    "Pokemon": "string",
+    "Acquisition": "string",
+    "Sprite URL": "object",
+    "Region": "string",
+    "Legendary": "bool",
+    "Starter": "bool",
+    "Evolution Stage": "Int64",
+    "Egg Groups": "object",
+    "Height": "float64",
+    "Weight": "float64",
+    **{stat: "Int64" for stat in STAT_COLUMNS},
+    "Type": "object",
+    "Schema Version": "int64",
+    "Enrichment Version": "int64",
+}
+ENRICHED_COLUMNS = [column for column in COLUMN_TYPES if column not in REQUIRED_COLUMNS and "Version" not in column]
+
+def fetch_details(names, max_workers=None):
+    """Fetch details for distinct Pokémon names concurrently, returning one row per name."""
+    names = list(dict.fromkeys(names))
+    max_workers = ENRICH_WORKERS if max_workers is None else max_workers
+    if not names:
+        return pd.DataFrame()
+
+    with span("fetch_details", names=len(names)), ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as executor:
+        details = list(executor.map(bind_run(get_pokemon_details), names))
+    return pd.DataFrame(details, index=pd.Index(names, name="Pokemon"))
+
+def _version_column(data, column):
+    """Return a row version column as integers, treating missing versions as 0."""
+    if column not in data.columns:
+        return pd.Series(0, index=data.index)
+    return pd.to_numeric(data[column], errors="coerce").fillna(0).astype(int)
+
+def needs_enrichment(data):
+    """Return a boolean mask of rows whose details are missing or were fetched by an older version."""
+    stale = _version_column(data, "Schema Version") < SCHEMA_VERSION
+    stale |= _version_column(data, "Enrichment Version") < ENRICHMENT_VERSION
+    if any(column not in data.columns for column in ENRICHED_COLUMNS):
+        stale |= data["Pokemon"] != "None"
+    return stale
+
+@timed()
+def enrich_data(data, max_workers=None):
+    """Enrich rows with missing or stale Pokémon details, leaving up-to-date rows untouched."""
+    stale = needs_enrichment(data)
+    if data.empty or not stale.any():
+        return data
+
+    enriched = data.copy()
+    enriched.attrs.pop("store_version", None)  # The rows no longer match the store until they are saved
+    enriched.loc[stale, "Schema Version"] = SCHEMA_VERSION
+
+    # Skip rows where Pokémon is 'None'
+    fetch_rows = stale & (enriched["Pokemon"] != "None") & enriched["Pokemon"].notna()
+    placeholders = stale & ~fetch_rows
+    enriched.loc[placeholders, "Enrichment Version"] = ENRICHMENT_VERSION
+
+    details = fetch_details(enriched.loc[fetch_rows, "Pokemon"].unique(), max_workers=max_workers)
+    if details.empty:
+        # No name was found on PokeAPI, mark the rows so they are not looked up again until ENRICHMENT_VERSION changes
+        for column in ENRICHED_COLUMNS:
+            if column not in enriched.columns:
+                enriched[column] = pd.Series(None, index=enriched.index, dtype=object)
+        enriched.loc[fetch_rows, "Enrichment Version"] = ENRICHMENT_VERSION
+        return normalise_columns(enriched)
+
+    # get_pokemon_details returns {"Type": []} when a lookup errors, leave those rows to retry
+    failed = details.drop(columns="Type", errors="ignore").isna().all(axis=1) & details.get("Type", pd.Series(dtype=object)).notna()
+    fetched = fetch_rows & ~enriched["Pokemon"].isin(details.index[failed])
+
+    # Join details back by name onto the stale rows only
+    joined = enriched.loc[fetched, ["Pokemon"]].join(details, on="Pokemon")
+    for column in details.columns:
+        if column not in enriched.columns:
+            enriched[column] = pd.Series(None, index=enriched.index, dtype=object)
+        enriched[column] = enriched[column].astype(object)
+        enriched.loc[fetched, column] = joined[column]
+        enriched[column] = enriched[column].infer_objects()
+    enriched.loc[fetched, "Enrichment Version"] = ENRICHMENT_VERSION
+    return normalise_columns(enriched)
+
+def _parse_literal(value):
+    """Parse a Python literal written by the legacy CSV storage, passing other values through."""
+    if isinstance(value, str):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+    return value
+
+def _as_list(value):
+    """Return a list column value as a list, treating missing values as empty."""
+    value = _parse_literal(value)
+    if hasattr(value, "__iter__") and not isinstance(value, (str, dict)):
+        return list(value)
+    return []
+
+def normalise_columns(data):
+    """Convert team data to the typed storage layout.
+
+    Splits "Base Stats" dicts into one integer column per stat, stores types and
+    egg groups as lists and the flags as bools. Strings written by the legacy CSV
+    storage are parsed once here, so analysis never has to parse rows.
+    """
+    data = data.copy()
+    for column in REQUIRED_COLUMNS:
+        if column not in data.columns:
+            data[column] = None
+
+    if "Base Stats" in data.columns:
+        base_stats = data["Base Stats"].map(_parse_literal)
+        has_stats = base_stats.map(lambda stats: isinstance(stats, dict))
+        if has_stats.any():
+            expanded = pd.DataFrame(base_stats[has_stats].tolist(), index=base_stats.index[has_stats])
+            for stat in STAT_COLUMNS:
+                if stat not in data.columns:
+                    data[stat] = pd.NA
+                if stat in expanded.columns:
+                    data.loc[has_stats, stat] = expanded[stat]
+        data = data.drop(columns="Base Stats")
+
+    for column in LIST_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].map(_as_list)
+
+    for column in ["Legendary", "Starter"]:
+        if column in data.columns:
+            data[column] = data[column].map({True: True, False: False, "True": True, "False": False}).fillna(False).astype(bool)
+
+    for column, dtype in COLUMN_TYPES.items():
+        if column not in data.columns or column in LIST_COLUMNS or dtype == "bool":
             continue
+        if dtype in ("int64", "Int64", "float64"):
+            values = pd.to_numeric(data[column], errors="coerce")
+            data[column] = values.fillna(0).astype(dtype) if dtype == "int64" else values.astype(dtype)
+        else:
+            data[column] = data[column].astype(dtype)
+    return data
+
+def empty_data():
+    """Return an empty team table with the required columns."""
+    return normalise_columns(pd.DataFrame(columns=REQUIRED_COLUMNS))
 
-        # Fetch details if missing
-        details = get_pokemon_details(row["Pokemon"])
-        for key, value in details.items():
-            row[key] = row.get(key, value)  # Update only if missing
-        enriched_rows.append(row)
+def _use_sqlite():
+    return STORE_BACKEND == "sqlite"
 
-    return pd.DataFrame(enriched_rows)
+def _store_paths(user=None):
+    """Return the (Parquet, SQLite) store paths for a user, or the shared store if user is None."""
+    if user is None:
+        return DATA_FILE, SQLITE_FILE
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", str(user))
+    if not name.strip("."):
+        # "", "." and ".." would resolve to USER_DATA_DIR or its parent, i.e. outside the user's own directory
+        name = "_" + name.replace(".", "_")
+    directory = os.path.join(USER_DATA_DIR, name)
+    return os.path.join(directory, os.path.basename(DATA_FILE)), os.path.join(directory, os.path.basename(SQLITE_FILE))
 
+def store_fingerprint(data, user=None):
+    """Return a key identifying team data: the store and version it was loaded at, in O(1).
 
-def load_data():
-    """Load team data from CSV or create an empty structure if missing."""
-    if not os.path.exists(DATA_FILE):
-        return pd.DataFrame(columns=["Game", "Playthrough", "Pokemon", "Acquisition"])
-    
+    Data that is not exactly a stored version, e.g. enriched but not saved, is hashed instead.
+    """
+    version = data.attrs.get("store_version")
+    if version is None:
+        return fingerprint(data)
+    data_file, sqlite_file = _store_paths(user)
+    return (sqlite_file if _use_sqlite() else data_file, version)
+
+def _aggregate_store(user=None):
+    data_file, sqlite_file = _store_paths(user)
+    return AggregateStore((sqlite_file if _use_sqlite() else data_file) + AGGREGATES_SUFFIX, STAT_COLUMNS)
+
+def _rebuild_aggregates(data, version, user=None):
+    """Recount the aggregates from the whole dataset, leaving them to be rebuilt on next load if that fails."""
+    try:
+        _aggregate_store(user).rebuild(data, version)
+    except Exception as e:
+        print(f"Error rebuilding aggregates: {e}")
+
+def _update_aggregates(rows, sign, before, user=None):
+    """Add or subtract the rows one write added or removed, in O(rows) rather than recounting the store."""
     try:
-        data = pd.read_csv(DATA_FILE)
-        required_columns = ["Game", "Playthrough", "Pokemon", "Acquisition"]
-        for column in required_columns:
+        _aggregate_store(user).update(rows, sign, before, data_version(user))
+    except Exception as e:
+        print(f"Error updating aggregates: {e}")
+
+def load_aggregates(data=None, user=None):
+    """Return the aggregate counters of the team store, rebuilding them only if a write was missed.
+
+    Pass the data already loaded to get counters that match it: they are
+    rebuilt from it instead of reading the store again, or counted from it in
+    memory if the store has been written since it was loaded.
+    """
+    store = _aggregate_store(user)
+    version = data_version(user)
+    if data is not None and data.attrs.get("store_version") != version:
+        # e.g. a team deleted from the sidebar after data was loaded for this rerun
+        return count_aggregates(data, STAT_COLUMNS)
+    aggregates = store.read()
+    if aggregates is not None and aggregates.store_version == version:
+        return aggregates
+    if data is None:
+        data = load_data(user=user)
+    store.rebuild(data, data.attrs.get("store_version", version))
+    return store.read()
+
+def _store_exists(user=None):
+    data_file, sqlite_file = _store_paths(user)
+    return os.path.exists(sqlite_file if _use_sqlite() else data_file)
+
+@contextmanager
+def _locked(path):
+    """Hold an exclusive lock on a store file while reading and rewriting it."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _path_locks_guard:
+        path_lock = _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    # The thread lock covers platforms without fcntl, flock covers other processes
+    with path_lock, open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _parquet_version(path):
+    """Return the version stored in a Parquet team file, or 0 if it does not exist."""
+    if not os.path.exists(path):
+        return 0
+    metadata = pq.read_metadata(path).metadata or {}
+    return int(metadata.get(VERSION_KEY, 0))
+
+def _write_parquet(data, path, version):
+    """Write team data atomically: to a temporary file that then replaces the store."""
+    table = pa.Table.from_pandas(normalise_columns(data), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), VERSION_KEY: str(version).encode()})
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def data_version(user=None):
+    """Return the current version of the team store, which every write increments."""
+    data_file, sqlite_file = _store_paths(user)
+    if _use_sqlite():
+        return team_store.get_version(sqlite_file) if os.path.exists(sqlite_file) else 0
+    return _parquet_version(data_file)
+
+def migrate_legacy_data():
+    """Convert older stores to the active shared one, returning True if anything was migrated.
+
+    The legacy CSV is converted to the active store, and the SQLite store imports
+    DATA_FILE the first time it is used.
+    """
+    if _store_exists():
+        return False
+    if _use_sqlite() and os.path.exists(DATA_FILE):
+        team_store.replace_all(SQLITE_FILE, pd.read_parquet(DATA_FILE))
+        return True
+    if not os.path.exists(LEGACY_DATA_FILE):
+        return False
+    with _locked(DATA_FILE):
+        if _store_exists() or not os.path.exists(LEGACY_DATA_FILE):
+            return False  # Another session migrated it first
+        try:
+            # Keep "None" placeholders as strings rather than reading them as missing
+            legacy = pd.read_csv(LEGACY_DATA_FILE, keep_default_na=False, na_values=[""])
+        except pd.errors.EmptyDataError:
+            return False
+
+        data = normalise_columns(legacy)
+        data["Schema Version"] = SCHEMA_VERSION
+        if _use_sqlite():
+            team_store.replace_all(SQLITE_FILE, data)
+        else:
+            _write_parquet(data, DATA_FILE, 1)
+        os.replace(LEGACY_DATA_FILE, f"{LEGACY_DATA_FILE}.migrated")
+    return True
+
+
+@timed()
+def load_data(game=None, playthrough=None, user=None):
+    """Load team data, optionally only one game or playthrough, or create an empty structure if missing.
+
+    When the whole store is loaded, the version it was read at is kept in
+    data.attrs["store_version"], so the data can be identified without reading it.
+    """
+    if user is None:
+        migrate_legacy_data()
+    data_file, sqlite_file = _store_paths(user)
+    if not _store_exists(user):
+        data, version = empty_data(), 0
+    elif _use_sqlite():
+        data = team_store.load_teams(sqlite_file, game=game, playthrough=playthrough)
+        version = data.attrs["store_version"]
+        data = normalise_columns(data)
+    else:
+        filters = []
+        if game is not None:
+            filters.append(("Game", "==", game))
+        if playthrough is not None:
+            filters.append(("Playthrough", "==", int(playthrough)))
+        table = pq.read_table(data_file, filters=filters or None)
+        data = table.to_pandas()
+        for column in REQUIRED_COLUMNS:
             if column not in data.columns:
                 data[column] = None
-        return data
-    except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=["Game", "Playthrough", "Pokemon", "Acquisition"])
+        version = int((table.schema.metadata or {}).get(VERSION_KEY, 0))
+
+    data.attrs.pop("store_version", None)
+    if game is None and playthrough is None:
+        data.attrs["store_version"] = version
+    return data
+
+@timed()
+def save_data(data, expected_version=None, user=None):
+    """Save the whole team dataset, replacing what is stored.
+
+    If expected_version is given, raises StaleDataError when another session
+    wrote to the store after that version was loaded. Returns the version written.
+    """
+    data_file, sqlite_file = _store_paths(user)
+    if _use_sqlite():
+        data = normalise_columns(data)
+        version = team_store.replace_all(sqlite_file, data, expected_version=expected_version)
+        _rebuild_aggregates(data, version, user)
+        return version
 
-def save_data(data):
-    """Save team data to CSV."""
-    data.to_csv(DATA_FILE, index=False)
+    with _locked(data_file):
+        version = _parquet_version(data_file)
+        if expected_version is not None and version != expected_version:
+            raise StaleDataError(f"Team data changed (version {version}, expected {expected_version})")
+        _write_parquet(data, data_file, version + 1)
+    _rebuild_aggregates(data, version + 1, user)
+    return version + 1
 
-def clear_data():
+def _update_parquet(data_file, update):
+    """Apply an update to the Parquet store under its lock, so concurrent sessions never lose writes."""
+    with _locked(data_file):
+        version = _parquet_version(data_file)
+        data = pd.read_parquet(data_file) if os.path.exists(data_file) else empty_data()
+        _write_parquet(update(data), data_file, version + 1)
+
+@timed()
+def add_team(game, playthrough, entries, user=None):
+    """Add a team's entries (a list of dicts or a DataFrame) to a playthrough."""
+    entries = normalise_columns(pd.DataFrame(entries).assign(Game=game, Playthrough=playthrough))
+    if user is None:
+        migrate_legacy_data()
+    data_file, sqlite_file = _store_paths(user)
+    before = data_version(user)
+    if _use_sqlite():
+        team_store.add_team(sqlite_file, game, playthrough, entries)
+    else:
+        _update_parquet(data_file, lambda data: pd.concat([data, entries], ignore_index=True))
+    _update_aggregates(entries, 1, before, user)
+
+@timed()
+def remove_team(game, playthrough, user=None):
+    """Remove every entry for one playthrough."""
+    if user is None:
+        migrate_legacy_data()
+    data_file, sqlite_file = _store_paths(user)
+    before = data_version(user)
+    if _use_sqlite():
+        removed = normalise_columns(team_store.load_teams(sqlite_file, game=game, playthrough=playthrough))
+        team_store.remove_team(sqlite_file, game, playthrough)
+    else:
+        removed = []
+
+        def update(data):
+            kept = (data["Game"] != game) | (data["Playthrough"] != playthrough)
+            removed.append(data[~kept])
+            return data[kept]
+        _update_parquet(data_file, update)
+        removed = removed[0]
+    _update_aggregates(removed, -1, before, user)
+
+def clear_data(user=None):
     """Clear all team data."""
-    if os.path.exists(DATA_FILE):
-        os.remove(DATA_FILE)
-
-def remove_entry(index):
-    """Remove a specific entry by index."""
-    data = load_data()
-    if index in data.index:
-        data = data.drop(index)
-        save_data(data)
+    data_file, sqlite_file = _store_paths(user)
+    _aggregate_store(user).clear()
+    if _use_sqlite():
+        team_store.replace_all(sqlite_file, empty_data())  # Keep the empty database so DATA_FILE is not re-imported
+        return
+
+    # Write an empty store rather than deleting it, so the version keeps increasing and
+    # a session that loaded the teams before the clear cannot save over later writes
+    with _locked(data_file):
+        _write_parquet(empty_data(), data_file, _parquet_version(data_file) + 1)
+
+def remove_entry(index, user=None):
+    """Remove a specific entry by index (the slot id when using the SQLite store)."""
+    data_file, sqlite_file = _store_paths(user)
+    if _use_sqlite():
+        team_store.remove_slot(sqlite_file, index)
+        return
+
+    _update_parquet(data_file, lambda data: data.drop(index) if index in data.index else data)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from utils.memo import BoundedCache, fingerprint, memoize
+
+# Histogram bins drawn by default, each split into fine bins that the KDE is computed over
+HISTOGRAM_BINS = 20
+FINE_BINS_PER_BIN = 32
+
+# The KDE curve extends this many bandwidths past the data, like seaborn's cut
+KDE_CUT = 3
+KERNEL_SIGMAS = 4
+
+DISTRIBUTION_CACHE = BoundedCache(64, 16 * 1024 * 1024)
+
+
+class Distribution:
+    """A column binned once, from which histograms and a KDE are derived.
+
+    Box-plot statistics come from utils.stats.StatSummary instead.
+    """
+
+    def __init__(self, values, bins=HISTOGRAM_BINS, key=None):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        self.count = len(values)
+        self.fingerprint = key
+
+        low, high = (values.min(), values.max()) if self.count else (0.0, 1.0)
+        if low == high:
+            low, high = low - 0.5, high + 0.5  # Same range numpy uses for a constant column
+        self.fine_counts, self.fine_edges = np.histogram(values, bins=bins * FINE_BINS_PER_BIN, range=(low, high))
+        self.counts = self.fine_counts.reshape(bins, FINE_BINS_PER_BIN).sum(axis=1)
+        self.edges = self.fine_edges[::FINE_BINS_PER_BIN]
+
+        self.mean = values.mean() if self.count else np.nan
+        self.std = values.std(ddof=1) if self.count > 1 else 0.0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def bandwidth(self):
+        """Kernel bandwidth by Scott's rule, never narrower than one fine bin."""
+        width = self.fine_edges[1] - self.fine_edges[0]
+        if not self.count or not self.std:
+            return width
+        return max(self.std * self.count ** (-1 / 5), width)
+
+    def kde(self):
+        """Return a Gaussian KDE as (grid, density), convolving the fine bins with the kernel by FFT."""
+        if not self.count:
+            return np.zeros(0), np.zeros(0)
+        width = self.fine_edges[1] - self.fine_edges[0]
+        pad = int(np.ceil(KDE_CUT * self.bandwidth / width))
+        half = int(np.ceil(KERNEL_SIGMAS * self.bandwidth / width))
+        counts = np.pad(self.fine_counts.astype(np.float64), pad)
+        centres = self.fine_edges[0] + (np.arange(len(counts)) - pad + 0.5) * width
+
+        offsets = np.arange(-half, half + 1) * width
+        kernel = np.exp(-0.5 * (offsets / self.bandwidth) ** 2)
+        kernel /= kernel.sum()
+
+        size = len(counts) + len(kernel) - 1
+        smoothed = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+        density = np.clip(smoothed[half:half + len(counts)], 0, None) / (self.count * width)
+        return centres, density
+
+
+def describe(values, bins=HISTOGRAM_BINS, key=None):
+    """Return the Distribution of a Series, reusing it while the Series' content is unchanged.
+
+    Pass a key that identifies the values, e.g. their section key and column,
+    to skip hashing them.
+    """
+    key = (fingerprint(values) if key is None else key, bins)
+    return memoize("distribution", key, Distribution, values, bins, key, cache=DISTRIBUTION_CACHE)
@@ -0,0 +1,76 @@
+import threading
+
+# Known starter base forms
+STARTER_BASE_FORMS = frozenset({
+    "bulbasaur", "charmander", "squirtle",  # Gen 1
+    "chikorita", "cyndaquil", "totodile",  # Gen 2
+    "treecko", "torchic", "mudkip",        # Gen 3
+    "turtwig", "chimchar", "piplup",       # Gen 4
+    "snivy", "tepig", "oshawott",         # Gen 5
+    "chespin", "fennekin", "froakie",     # Gen 6
+    "rowlet", "litten", "popplio",        # Gen 7
+    "grookey", "scorbunny", "sobble",     # Gen 8
+    "eevee", "pikachu"                    # Let's Go
+})
+
+# Species name -> evolution entry, built from evolution-chain payloads as they are fetched
+_species = {}
+_lock = threading.Lock()
+
+
+def _chain_id(evolution_chain_data):
+    """Return an evolution chain's id, falling back to its base species name."""
+    return evolution_chain_data.get("id") or evolution_chain_data["chain"]["species"]["name"]
+
+
+def index_chain(evolution_chain_data):
+    """Add every species in an evolution chain, across all of its branches, to the index."""
+    root = evolution_chain_data["chain"]
+    chain_id = _chain_id(evolution_chain_data)
+    base = root["species"]["name"]
+
+    # Walk every branch, recording each species' stage, parent and children
+    entries = {}
+    branches = []
+    stack = [(root, 1, None, (base,))]
+    while stack:
+        node, stage, parent, path = stack.pop()
+        name = node["species"]["name"]
+        children = [child["species"]["name"] for child in node["evolves_to"]]
+        entries[name] = {
+            "chain_id": chain_id,
+            "base": base,
+            "stage": stage,
+            "evolves_from": parent,
+            "evolves_to": tuple(children),
+        }
+        if not children:
+            branches.append(path)
+        for child in node["evolves_to"]:
+            stack.append((child, stage + 1, name, path + (child["species"]["name"],)))
+
+    starter = any(name in STARTER_BASE_FORMS for name in entries)
+    for name, entry in entries.items():
+        entry["starter"] = starter
+        entry["branches"] = tuple(branch for branch in branches if name in branch)
+
+    with _lock:
+        _species.update(entries)
+    return entries
+
+
+def lookup(species_name):
+    """Return the indexed evolution entry for a species, or None if its chain has not been indexed."""
+    return _species.get(species_name.lower())
+
+
+def is_starter(species_name):
+    """Return True if the species belongs to a starter chain, or None if it is not indexed."""
+    entry = lookup(species_name)
+    return None if entry is None else entry["starter"]
+
+
+def clear():
+    """Empty the index."""
+    with _lock:
+        _species.clear()
@@ -0,0 +1,118 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+from utils.perf import count, span
+
+# Bounds for memoized results, the least recently used entries are evicted first
+MEMO_MAX_ENTRIES = 128
+MEMO_MAX_BYTES = 64 * 1024 * 1024
+
+# Columns that identify a team dataset's content, row versions cover the enriched details
+FINGERPRINT_COLUMNS = ["Game", "Playthrough", "Pokemon", "Acquisition", "Schema Version", "Enrichment Version"]
+
+
+def fingerprint(data, columns=None):
+    """Return a cheap content fingerprint of a DataFrame or Series, hashing only its identifying columns."""
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=str(data.name))
+        columns = list(data.columns)
+    columns = FINGERPRINT_COLUMNS if columns is None else columns
+    subset = data[[column for column in columns if column in data.columns]]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((len(subset), list(subset.columns))).encode())
+    if len(subset):
+        digest.update(pd.util.hash_pandas_object(subset, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Estimate the memory held by a memoized value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """A thread-safe LRU cache bounded by entry count and estimated memory."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.counter = None  # Name hits and misses are also counted under in the active run, see perf.watch_cache
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value stored for key, marking it as recently used."""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+                value = self._entries[key][0]
+            self.stats["hits" if hit else "misses"] += 1
+        if self.counter is not None:
+            count(f"{self.counter}.{'hits' if hit else 'misses'}")
+        return value if hit else default
+
+    def put(self, key, value, size=None):
+        """Store a value, evicting the least recently used entries if over the bounds."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+
+_MISSING = object()
+SECTION_CACHE = BoundedCache(MEMO_MAX_ENTRIES, MEMO_MAX_BYTES)
+
+
+def memoize(name, key, compute, *args, cache=None, **kwargs):
+    """Return compute(*args, **kwargs), reusing the result stored for (name, key) if there is one.
+
+    Pass a fingerprint of the inputs as key, so results are recomputed
+    automatically once the underlying data changes.
+    """
+    cache = SECTION_CACHE if cache is None else cache
+    value = cache.get((name, key), _MISSING)
+    if value is _MISSING:
+        with span(f"compute:{name}"):
+            value = compute(*args, **kwargs)
+        cache.put((name, key), value)
+    return value
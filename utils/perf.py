@@ -0,0 +1,220 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Record spans and counters of every rerun, otherwise only sessions showing the debug panel record theirs
+PERF_ENABLED = os.environ.get("POKEGAMEDEX_PERF", "").lower() in ("1", "true", "yes")
+# Append every finished rerun to this JSON lines file for offline analysis
+PERF_LOG_FILE = os.environ.get("POKEGAMEDEX_PERF_LOG")
+
+# Spans kept per rerun, later ones are only counted
+MAX_SPANS = 5000
+# Finished reruns kept for export
+RUN_HISTORY = 20
+# Functions listed in a profiled rerun's report
+PROFILE_LINES = 40
+
+_enabled = PERF_ENABLED or bool(PERF_LOG_FILE)
+# The run being recorded by this thread, Streamlit reruns each session on its own thread
+_current_run = contextvars.ContextVar("perf_run", default=None)
+_history = deque(maxlen=RUN_HISTORY)
+_watched_caches = []
+_lock = threading.Lock()
+_local = threading.local()  # Each thread's stack of open span names
+
+
+class Run:
+    """The spans and counters recorded during one rerun of the app.
+
+    Only the thread that started the run records into it. Work handed to
+    worker threads, e.g. enrichment lookups, records into it when wrapped
+    with bind_run.
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.started_at = time.time()
+        self.seconds = None
+        self.spans = []
+        self.dropped_spans = 0
+        # Watched caches are listed even when unused, so the debug panel shows them
+        self.counters = {f"{name}.{stat}": 0 for name in _watched_caches for stat in ("hits", "misses")}
+        self.profile = None
+        self._origin = time.perf_counter()
+
+    def span_totals(self):
+        """Return name -> (calls, total seconds) over the recorded spans, slowest first."""
+        totals = {}
+        for record in self.spans:
+            calls, seconds = totals.get(record["name"], (0, 0.0))
+            totals[record["name"]] = (calls + 1, seconds + record["seconds"])
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def hit_ratios(self):
+        """Return the hit ratio of every counter pair named "<cache>.hits" and "<cache>.misses"."""
+        ratios = {}
+        for name, hits in self.counters.items():
+            if name.endswith(".hits"):
+                cache = name[:-len(".hits")]
+                lookups = hits + self.counters.get(f"{cache}.misses", 0)
+                ratios[cache] = hits / lookups if lookups else None
+        return ratios
+
+    def records(self):
+        """Return the run as JSON-serialisable records: a summary, then one per span."""
+        summary = {
+            "record": "run", "label": self.label,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "seconds": self.seconds, "counters": self.counters, "hit_ratios": self.hit_ratios(),
+            "dropped_spans": self.dropped_spans, "profile": self.profile,
+        }
+        return [summary] + [{"record": "span", "label": self.label, **record} for record in self.spans]
+
+
+def watch_cache(name, cache):
+    """Count a BoundedCache's hits and misses in the active run as "<name>.hits" and "<name>.misses"."""
+    cache.counter = name
+    if name not in _watched_caches:
+        _watched_caches.append(name)
+
+
+def start_run(label="", record=False):
+    """Start recording a new run on this thread, returning it, or None while recording is off.
+
+    Pass record=True to record this run even when recording is off for the rest of the server.
+    """
+    if not (_enabled or record):
+        _current_run.set(None)
+        return None
+    run = Run(label)
+    _current_run.set(run)
+    return run
+
+
+def finish_run():
+    """Finish this thread's active run, keeping it for export, and return it."""
+    run = _current_run.get()
+    _current_run.set(None)
+    if run is None:
+        return None
+    run.seconds = time.perf_counter() - run._origin
+    with _lock:
+        _history.append(run)
+    if PERF_LOG_FILE:
+        try:
+            export_jsonl(PERF_LOG_FILE, [run])
+        except OSError as e:
+            print(f"Error writing performance log {PERF_LOG_FILE}: {e}")
+    return run
+
+
+def recent_runs():
+    """Return the finished runs of every session still kept, oldest first."""
+    with _lock:
+        return list(_history)
+
+
+def bind_run(function):
+    """Wrap function so it records into the run active here, wherever it is later called.
+
+    Wrap work before handing it to a worker thread, which would otherwise record nothing.
+    """
+    run = _current_run.get()
+    if run is None:
+        return function
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        token = _current_run.set(run)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_run.reset(token)
+    return wrapper
+
+
+def count(name, value=1):
+    """Add value to a counter of the active run."""
+    run = _current_run.get()
+    if run is None:
+        return
+    with _lock:
+        run.counters[name] = run.counters.get(name, 0) + value
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the enclosed block as a named span of the active run, with optional extra fields."""
+    run = _current_run.get()
+    if run is None:
+        yield
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        record = {
+            "name": name, "parent": parent, "depth": len(stack), "thread": threading.current_thread().name,
+            "start": start - run._origin, "seconds": seconds, **fields,
+        }
+        with _lock:
+            if len(run.spans) < MAX_SPANS:
+                run.spans.append(record)
+            else:
+                run.dropped_spans += 1
+
+
+def timed(name=None):
+    """Decorate a function so each call is recorded as a span, named after the function by default."""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(run):
+    """Profile the enclosed block with cProfile, storing the slowest functions in run.profile."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        if run is not None:
+            run.profile = report.getvalue()
+
+
+def to_jsonl(runs=None):
+    """Return runs, by default every kept run, as JSON lines."""
+    runs = recent_runs() if runs is None else runs
+    return "".join(json.dumps(record, default=str) + "\n" for run in runs for record in run.records())
+
+
+def export_jsonl(path, runs=None):
+    """Append runs, by default every kept run, to a JSON lines file."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(to_jsonl(runs))
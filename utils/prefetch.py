@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.api import get_pokemon_details
+from utils.perf import bind_run
+
+# Lookups run at most this many at a time, shared by every session
+PREFETCH_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the shared prefetch pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+    return _executor
+
+
+class DetailPrefetcher:
+    """Fetches Pokémon details in the background as each slot of a new team is picked.
+
+    Picking another Pokémon for a slot cancels the lookup for the previous one if
+    it has not started yet, so only the latest selection of each slot is waited on.
+    """
+
+    def __init__(self):
+        self._slots = {}  # slot -> (name, future)
+        self._lock = threading.Lock()
+
+    def select(self, slot, name):
+        """Start fetching details for the Pokémon picked in a slot, unless it is already being fetched."""
+        with self._lock:
+            current = self._slots.get(slot)
+            if current is not None and current[0] == name:
+                return
+            if current is not None:
+                current[1].cancel()
+            if name == "None":
+                self._slots.pop(slot, None)
+                return
+            self._slots[slot] = (name, _get_executor().submit(bind_run(get_pokemon_details), name))
+
+    def details(self, slot, name):
+        """Return the details for the Pokémon in a slot, waiting for its prefetch or fetching them now."""
+        with self._lock:
+            current = self._slots.get(slot)
+        if current is not None and current[0] == name and not current[1].cancelled():
+            return current[1].result()
+        return get_pokemon_details(name)
+
+    def cancel(self):
+        """Cancel every lookup that has not started yet, e.g. once the team is saved or discarded."""
+        with self._lock:
+            for _, future in self._slots.values():
+                future.cancel()
+            self._slots.clear()
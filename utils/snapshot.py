@@ -0,0 +1,120 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import api
+
+# Bump when the record layout written by api.build_record changes
+SNAPSHOT_VERSION = 2  # 2: real evolution stages
+SNAPSHOT_FILE = "data/pokedex_snapshot.json.gz"
+
+
+def read_snapshot(path):
+    """Load a snapshot file, checking it was written by a compatible version."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {snapshot.get('version')} is not supported (expected {SNAPSHOT_VERSION})")
+    return snapshot
+
+
+def write_snapshot(path, names, records, base_url):
+    """Write a snapshot atomically so readers never see a partial file."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "base_url": base_url,
+        "names": names,
+        "records": records,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def _read_progress(progress_path):
+    """Read records already fetched by an interrupted build."""
+    records = {}
+    if not os.path.exists(progress_path):
+        return records
+    with open(progress_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Skip a line torn by the interruption
+            records[entry["name"]] = entry["record"]
+    return records
+
+
+def build_snapshot(path=SNAPSHOT_FILE, base_url=None, workers=8, limit=100000):
+    """Fetch every Pokémon, species and evolution chain once and write them to a snapshot.
+
+    Progress is appended to a .progress file as records arrive, so an interrupted
+    build resumes where it stopped instead of starting over.
+    """
+    if base_url:
+        api.API_BASE_URL = base_url if base_url.endswith("/") else f"{base_url}/"
+    api.use_snapshot(None)
+    api.configure_session(pool_maxsize=max(workers, api.POOL_MAXSIZE))
+
+    names = api.get_pokemon_names(limit=limit)
+    if not names:
+        raise RuntimeError(f"Could not fetch the Pokémon list from {api.API_BASE_URL}")
+
+    progress_path = f"{path}.progress"
+    records = _read_progress(progress_path)
+    pending = [name.lower() for name in names if name.lower() not in records]
+    print(f"{len(names)} Pokémon, {len(records)} already fetched, {len(pending)} to go")
+
+    failed = []
+    with open(progress_path, "a+", encoding="utf-8") as progress, ThreadPoolExecutor(max_workers=workers) as executor:
+        # Start on a fresh line if the previous build was interrupted mid-write
+        if progress.tell() > 0:
+            progress.seek(progress.tell() - 1)
+            if progress.read(1) != "\n":
+                progress.write("\n")
+        futures = {executor.submit(api.resolve_pokemon, name): name for name in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"Error fetching {name}: {e}")
+                failed.append(name)
+                continue
+            if record is None:
+                continue
+            records[name] = record
+            progress.write(json.dumps({"name": name, "record": record}, separators=(",", ":")) + "\n")
+            if done % 100 == 0:
+                progress.flush()
+                print(f"Fetched {done}/{len(pending)}")
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} Pokémon failed, rerun to resume: {', '.join(failed[:10])}")
+
+    write_snapshot(path, names, records, api.API_BASE_URL)
+    os.remove(progress_path)
+    print(f"Wrote {len(records)} records to {path}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an offline Pokédex snapshot from PokeAPI.")
+    parser.add_argument("--output", default=SNAPSHOT_FILE, help="Snapshot file to write.")
+    parser.add_argument("--base-url", default=None, help="PokeAPI base URL, e.g. a local stand-in server.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of parallel fetch workers.")
+    parser.add_argument("--limit", type=int, default=100000, help="Maximum number of Pokémon to include.")
+    args = parser.parse_args(argv)
+    build_snapshot(args.output, base_url=args.base_url, workers=args.workers, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
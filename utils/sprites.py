@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from utils import cache
+from utils.api import CONNECT_TIMEOUT, READ_TIMEOUT, get_session
+from utils.perf import bind_run, count, span
+
+# Sprites are stored once per content hash under objects/, urls/ maps each sprite URL to its hash
+SPRITE_DIR = os.environ.get("POKEGAMEDEX_SPRITE_DIR", "data/sprites")
+
+# Pixel size of each sprite in a team's strip, twice the sidebar's display size for sharp high-DPI screens
+SPRITE_PIXELS = 80
+SPRITE_WIDTH = 40  # Display width of each sprite in the sidebar
+SPRITE_WORKERS = 8  # Concurrent downloads when warming the cache
+FAILED_RETRY_AFTER = 300  # Seconds before retrying a sprite that could not be downloaded
+
+# Sprite URL -> content hash, and tuple of sprite URLs -> strip path, for sprites already on disk
+_hashes = {}
+_strips = {}
+_failed = {}  # Sprite URL -> time its download last failed
+_lock = threading.Lock()
+
+
+def _path(*parts):
+    return os.path.join(SPRITE_DIR, *parts)
+
+
+def _url_key(url):
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _write_atomic(path, content):
+    """Write a file via a temporary file, so readers never see a partial image."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def sprite_hash(url):
+    """Return the content hash of a sprite already on disk, or None if it has not been downloaded."""
+    digest = _hashes.get(url)
+    if digest is not None:
+        return digest
+    try:
+        with open(_path("urls", _url_key(url)), encoding="utf-8") as f:
+            digest = f.read().strip()
+    except OSError:
+        return None
+    if not os.path.exists(_path("objects", f"{digest}.png")):
+        return None
+    with _lock:
+        _hashes[url] = digest
+    return digest
+
+
+def fetch_sprite(url):
+    """Download a sprite into the cache unless it is already there, returning its content hash or None."""
+    digest = sprite_hash(url)
+    if digest is not None:
+        count("sprites.hits")
+        return digest
+    count("sprites.misses")
+    if cache.is_offline() or time.time() - _failed.get(url, 0) < FAILED_RETRY_AFTER:
+        return None
+
+    try:
+        with span("sprite_download"):
+            response = get_session().get(url, headers={"Accept": "image/*"}, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Error downloading sprite {url}: {e}")
+        _failed[url] = time.time()
+        return None
+
+    digest = hashlib.sha256(response.content).hexdigest()
+    object_path = _path("objects", f"{digest}.png")
+    if not os.path.exists(object_path):
+        _write_atomic(object_path, response.content)
+    _write_atomic(_path("urls", _url_key(url)), digest.encode("utf-8"))
+    with _lock:
+        _hashes[url] = digest
+    return digest
+
+
+def warm_sprites(urls, max_workers=None):
+    """Download every sprite that is not cached yet, concurrently."""
+    now = time.time()
+    missing = [
+        url for url in dict.fromkeys(urls)
+        if sprite_hash(url) is None and now - _failed.get(url, 0) >= FAILED_RETRY_AFTER
+    ]
+    if not missing or cache.is_offline():
+        return
+    max_workers = SPRITE_WORKERS if max_workers is None else max_workers
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+        list(executor.map(bind_run(fetch_sprite), missing))
+
+
+def _composite(digests):
+    """Paste sprites side by side into one transparent PNG, leaving a gap for each digest that is None."""
+    from PIL import Image
+    strip = Image.new("RGBA", (SPRITE_PIXELS * len(digests), SPRITE_PIXELS), (0, 0, 0, 0))
+    for position, digest in enumerate(digests):
+        if digest is None:
+            continue
+        try:
+            with Image.open(_path("objects", f"{digest}.png")) as sprite:
+                # Nearest-neighbour scaling keeps pixel art crisp
+                sprite = sprite.convert("RGBA").resize((SPRITE_PIXELS, SPRITE_PIXELS), Image.NEAREST)
+        except OSError as e:
+            print(f"Error reading sprite {digest}: {e}")
+            continue
+        strip.paste(sprite, (position * SPRITE_PIXELS, 0))
+    buffer = io.BytesIO()
+    strip.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def team_strip(urls):
+    """Return the path of a PNG strip of a team's sprites, compositing it on first use, or None if none are cached.
+
+    Strips are named after the hashes of their sprites, so a team showing the
+    same sprites in the same order always reuses the same file.
+    """
+    urls = tuple(urls)
+    path = _strips.get(urls)
+    if path is not None:
+        count("strips.hits")
+        return path
+
+    # Sprites that could not be downloaded leave a transparent gap, so the strip keeps one slot per URL
+    digests = [fetch_sprite(url) for url in urls]
+    if not any(digests):
+        return None
+    key = hashlib.blake2b(repr((SPRITE_PIXELS, digests)).encode("utf-8"), digest_size=16).hexdigest()
+    path = _path("strips", f"{key}.png")
+    if os.path.exists(path):
+        count("strips.hits")
+    else:
+        count("strips.misses")
+        with span("sprite_strip", sprites=len(urls)):
+            _write_atomic(path, _composite(digests))
+    # Strips missing a sprite that failed to download are retried on the next rerun
+    if all(digests):
+        with _lock:
+            _strips[urls] = path
+    return path
+
+
+def team_strips(teams):
+    """Return a strip path, or None, for each team's list of sprite URLs, downloading missing sprites concurrently."""
+    warm_sprites(url for urls in teams for url in urls)
+    return [team_strip(urls) if urls else None for urls in teams]
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from utils.data_manager import STAT_COLUMNS
+
+# The matrix has one column per base stat followed by the stat total
+TOTAL_COLUMN = "Stat Total"
+SUMMARY_COLUMNS = STAT_COLUMNS + [TOTAL_COLUMN]
+
+# Heights and weights come from PokeAPI in decimetres and hectograms, so they are exact in tenths
+MEASUREMENT_COLUMNS = ["Height", "Weight"]
+MEASUREMENT_SCALE = 10
+
+# Quartiles reported for every column: lower quartile, median, upper quartile
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Box-plot whiskers reach the furthest value within this many IQRs of the quartiles
+WHISKER_IQR = 1.5
+# Outliers drawn at most, the rest are thinned out evenly
+MAX_FLIERS = 200
+
+
+def stat_matrix(data):
+    """Return the base stats of complete rows as a contiguous N×7 int32 matrix, the last column being the total."""
+    stats = data[STAT_COLUMNS]
+    complete = stats.notna().all(axis=1).to_numpy()
+    matrix = np.empty((int(complete.sum()), len(SUMMARY_COLUMNS)), dtype=np.int32)
+    matrix[:, :-1] = stats[complete].to_numpy(dtype=np.int32)
+    np.sum(matrix[:, :-1], axis=1, out=matrix[:, -1])
+    return matrix, complete
+
+
+def _quantile(cumulative, values, q):
+    """Return each row's q-quantile from its cumulative counts, interpolating linearly like numpy."""
+    position = q * (cumulative[:, -1] - 1)
+    lower = np.floor(position)
+    fraction = position - lower
+    rows = np.arange(len(cumulative))
+    below = (cumulative <= lower[:, None]).sum(axis=1)
+    above = np.minimum((cumulative <= lower[:, None] + 1).sum(axis=1), cumulative.shape[1] - 1)
+    return values[rows, below] + fraction * (values[rows, above] - values[rows, below])
+
+
+class StatSummary:
+    """Per-stat and stat-total reductions over a roster, computed from one pass over its stat matrix.
+
+    Every array attribute has one value per column, SUMMARY_COLUMNS by default.
+    The matrix holds integers in 1/scale units, and every value is reported
+    back in whole units.
+    """
+
+    def __init__(self, matrix, pokemon, columns=SUMMARY_COLUMNS, scale=1):
+        self.matrix = matrix
+        self.pokemon = pokemon
+        self.columns = list(columns)
+        self.scale = scale
+        self.count = len(matrix)
+        self._counts = self._values = None
+        if not self.count:
+            empty = np.full(len(self.columns), np.nan)
+            self.mean = self.std = self.q1 = self.median = self.q3 = empty
+            self.min = self.max = self.whislo = self.whishi = empty
+            self.argmin = self.argmax = self.outliers = np.zeros(len(self.columns), dtype=np.intp)
+            return
+
+        # Stats are small integers, so one bincount over the matrix yields every column's exact distribution
+        self.min = matrix.min(axis=0)
+        self.max = matrix.max(axis=0)
+        self.argmin = matrix.argmin(axis=0)
+        self.argmax = matrix.argmax(axis=0)
+        width = int((self.max - self.min).max()) + 1
+        offsets = np.arange(len(self.columns)) * width - self.min
+        counts = np.bincount((matrix + offsets).ravel(), minlength=len(self.columns) * width)
+        counts = counts.reshape(len(self.columns), width)
+        values = self.min[:, None] + np.arange(width)
+
+        self.mean = (counts * values).sum(axis=1) / self.count
+        if self.count > 1:
+            self.std = np.sqrt((counts * (values - self.mean[:, None]) ** 2).sum(axis=1) / (self.count - 1))
+        else:
+            self.std = np.full(len(self.columns), np.nan)
+        cumulative = counts.cumsum(axis=1)
+        self.q1, self.median, self.q3 = (_quantile(cumulative, values, q) for q in QUANTILES)
+
+        # Whiskers stop at the most extreme values inside the fences, like matplotlib's boxplot
+        iqr = self.q3 - self.q1
+        inside = (values >= (self.q1 - WHISKER_IQR * iqr)[:, None]) & (values <= (self.q3 + WHISKER_IQR * iqr)[:, None])
+        present = inside & (counts > 0)
+        self.whislo = values[np.arange(len(values)), present.argmax(axis=1)]
+        self.whishi = values[np.arange(len(values)), width - 1 - present[:, ::-1].argmax(axis=1)]
+        self.outliers = np.where(inside, 0, counts).sum(axis=1)
+        self._counts, self._values, self._inside = counts, values, inside
+
+        if scale != 1:
+            for name in ("mean", "std", "min", "max", "q1", "median", "q3", "whislo", "whishi"):
+                setattr(self, name, getattr(self, name) / scale)
+
+    def __len__(self):
+        return self.count
+
+    def index(self, column):
+        return self.columns.index(column)
+
+    def frame(self):
+        """Return the stat matrix as a DataFrame sharing its memory, for charts."""
+        return pd.DataFrame(self.matrix, columns=self.columns, copy=False)
+
+    def column(self, column):
+        """Return every reduction for one column as a dict."""
+        i = self.index(column)
+        return {
+            "count": self.count,
+            "mean": self.mean[i],
+            "std": self.std[i],
+            "min": self.min[i],
+            "max": self.max[i],
+            "min_pokemon": self.pokemon[self.argmin[i]] if self.count else None,
+            "max_pokemon": self.pokemon[self.argmax[i]] if self.count else None,
+            "q1": self.q1[i],
+            "median": self.median[i],
+            "q3": self.q3[i],
+            "whislo": self.whislo[i],
+            "whishi": self.whishi[i],
+            "outliers": int(self.outliers[i]),
+        }
+
+    def box_stats(self, column, label=""):
+        """Return one column's box-plot statistics in the form matplotlib's Axes.bxp takes."""
+        i = self.index(column)
+        if self.count:
+            # Each distinct value outside the whiskers is drawn once
+            fliers = self._values[i][~self._inside[i] & (self._counts[i] > 0)] / self.scale
+        else:
+            fliers = np.zeros(0)
+        if len(fliers) > MAX_FLIERS:
+            fliers = fliers[np.linspace(0, len(fliers) - 1, MAX_FLIERS).astype(int)]
+        return {
+            "label": label, "mean": self.mean[i], "med": self.median[i], "q1": self.q1[i], "q3": self.q3[i],
+            "whislo": self.whislo[i], "whishi": self.whishi[i], "fliers": fliers,
+        }
+
+
+def summarise_stats(data):
+    """Summarise the base stats of every row with complete stats."""
+    matrix, complete = stat_matrix(data)
+    return StatSummary(matrix, data["Pokemon"].to_numpy()[complete])
+
+
+def summarise_measurements(data):
+    """Summarise the heights and weights of every row that has both, counting in tenths."""
+    measurements = data[MEASUREMENT_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    complete = measurements.notna().all(axis=1).to_numpy()
+    matrix = np.rint(measurements[complete].to_numpy(dtype=np.float64) * MEASUREMENT_SCALE).astype(np.int64)
+    return StatSummary(matrix, data["Pokemon"].to_numpy()[complete], MEASUREMENT_COLUMNS, MEASUREMENT_SCALE)
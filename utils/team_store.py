@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+
+# Team data columns and the team_slots columns they are stored in
+SLOT_COLUMNS = {
+    "Pokemon": "pokemon",
+    "Acquisition": "acquisition",
+    "Sprite URL": "sprite_url",
+    "Region": "region",
+    "Legendary": "legendary",
+    "Starter": "starter",
+    "Evolution Stage": "evolution_stage",
+    "Egg Groups": "egg_groups",
+    "Height": "height",
+    "Weight": "weight",
+    "hp": "hp",
+    "attack": "attack",
+    "defense": "defense",
+    "special-attack": "special_attack",
+    "special-defense": "special_defense",
+    "speed": "speed",
+    "Type": "types",
+    "Schema Version": "schema_version",
+    "Enrichment Version": "enrichment_version",
+}
+JSON_COLUMNS = ["Egg Groups", "Type"]
+
+# PRAGMA user_version of the current schema, 2: region column
+DATABASE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS playthroughs (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    UNIQUE (game_id, number)
+);
+CREATE TABLE IF NOT EXISTS team_slots (
+    id INTEGER PRIMARY KEY,
+    playthrough_id INTEGER NOT NULL REFERENCES playthroughs (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    pokemon TEXT,
+    acquisition TEXT,
+    sprite_url TEXT,
+    region TEXT,
+    legendary INTEGER,
+    starter INTEGER,
+    evolution_stage INTEGER,
+    egg_groups TEXT,
+    height REAL,
+    weight REAL,
+    hp INTEGER,
+    attack INTEGER,
+    defense INTEGER,
+    special_attack INTEGER,
+    special_defense INTEGER,
+    speed INTEGER,
+    types TEXT,
+    schema_version INTEGER,
+    enrichment_version INTEGER
+);
+CREATE INDEX IF NOT EXISTS team_slots_playthrough ON team_slots (playthrough_id, slot);
+"""
+
+
+def connect(path):
+    """Open the team database, creating the schema if needed."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if user_version == 0:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA + f"PRAGMA user_version = {DATABASE_VERSION};")
+    elif user_version < DATABASE_VERSION:
+        _migrate(conn)
+    return conn
+
+
+def _migrate(conn):
+    """Bring a database created by an older release up to DATABASE_VERSION."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another connection may have migrated it while this one waited for the lock
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+            conn.execute("ALTER TABLE team_slots ADD COLUMN region TEXT")
+        conn.execute(f"PRAGMA user_version = {DATABASE_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class StaleDataError(RuntimeError):
+    """Raised when a write expected an older version of the team data than is stored."""
+
+
+def get_version(path):
+    """Return the store's version, which every write increments."""
+    conn = connect(path)
+    try:
+        return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _transaction(path, expected_version=None):
+    """Run a write transaction that takes the write lock up front and bumps the store version."""
+    conn = connect(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            if expected_version is not None and version != expected_version:
+                raise StaleDataError(f"Team data changed (version {version}, expected {expected_version})")
+            yield conn
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def _to_sql(value, column):
+    """Convert a team data value to something SQLite can store."""
+    if column in JSON_COLUMNS:
+        return json.dumps(list(value) if hasattr(value, "__iter__") and not isinstance(value, str) else [])
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalars
+    return value
+
+
+def _slot_rows(entries, playthrough_id, first_slot=1):
+    """Build team_slots rows for a team's entries in slot order."""
+    rows = []
+    values = entries.reindex(columns=list(SLOT_COLUMNS)).itertuples(index=False)
+    for slot, entry in enumerate(values, start=first_slot):
+        rows.append([playthrough_id, slot] + [_to_sql(value, column) for value, column in zip(entry, SLOT_COLUMNS)])
+    return rows
+
+
+def _playthrough_id(conn, game, playthrough, create=False):
+    """Look up a playthrough's id, creating it and its game if requested."""
+    if create:
+        conn.execute("INSERT OR IGNORE INTO games (name) VALUES (?)", (game,))
+    row = conn.execute("SELECT id FROM games WHERE name = ?", (game,)).fetchone()
+    if row is None:
+        return None
+    game_id = row[0]
+    if create:
+        conn.execute("INSERT OR IGNORE INTO playthroughs (game_id, number) VALUES (?, ?)", (game_id, int(playthrough)))
+    row = conn.execute(
+        "SELECT id FROM playthroughs WHERE game_id = ? AND number = ?", (game_id, int(playthrough))
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _insert_slots(conn, rows):
+    """Insert team_slots rows built by _slot_rows."""
+    columns = ", ".join(["playthrough_id", "slot"] + list(SLOT_COLUMNS.values()))
+    placeholders = ", ".join("?" * (len(SLOT_COLUMNS) + 2))
+    conn.executemany(f"INSERT INTO team_slots ({columns}) VALUES ({placeholders})", rows)
+
+
+def load_teams(path, game=None, playthrough=None):
+    """Load team slots, optionally only those for one game or playthrough, indexed by slot id."""
+    query = [
+        "SELECT team_slots.id, games.name, playthroughs.number, "
+        + ", ".join(f"team_slots.{column}" for column in SLOT_COLUMNS.values()),
+        "FROM team_slots",
+        "JOIN playthroughs ON playthroughs.id = team_slots.playthrough_id",
+        "JOIN games ON games.id = playthroughs.game_id",
+    ]
+    conditions, params = [], []
+    if game is not None:
+        conditions.append("games.name = ?")
+        params.append(game)
+    if playthrough is not None:
+        conditions.append("playthroughs.number = ?")
+        params.append(int(playthrough))
+    if conditions:
+        query.append("WHERE " + " AND ".join(conditions))
+    query.append("ORDER BY playthroughs.id, team_slots.slot")
+
+    conn = connect(path)
+    try:
+        # Read the rows and the version they belong to in one snapshot
+        conn.execute("BEGIN")
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        rows = conn.execute(" ".join(query), params).fetchall()
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    data = pd.DataFrame(rows, columns=["id", "Game", "Playthrough"] + list(SLOT_COLUMNS)).set_index("id")
+    data.index.name = None
+    for column in JSON_COLUMNS:
+        data[column] = data[column].map(lambda value: json.loads(value) if value else [])
+    data.attrs["store_version"] = version
+    return data
+
+
+def add_team(path, game, playthrough, entries):
+    """Add one team's entries to a playthrough in a single transaction."""
+    with _transaction(path) as conn:
+        playthrough_id = _playthrough_id(conn, game, playthrough, create=True)
+        last_slot = conn.execute(
+            "SELECT COALESCE(MAX(slot), 0) FROM team_slots WHERE playthrough_id = ?", (playthrough_id,)
+        ).fetchone()[0]
+        _insert_slots(conn, _slot_rows(entries, playthrough_id, first_slot=last_slot + 1))
+
+
+def remove_team(path, game, playthrough):
+    """Delete one playthrough and its team in a single transaction."""
+    with _transaction(path) as conn:
+        playthrough_id = _playthrough_id(conn, game, playthrough)
+        if playthrough_id is not None:
+            conn.execute("DELETE FROM playthroughs WHERE id = ?", (playthrough_id,))
+
+
+def remove_slot(path, slot_id):
+    """Delete a single team slot by id."""
+    with _transaction(path) as conn:
+        conn.execute("DELETE FROM team_slots WHERE id = ?", (int(slot_id),))
+
+
+def replace_all(path, data, expected_version=None):
+    """Replace every team with the given data in a single transaction.
+
+    Raises StaleDataError if expected_version is given and another write happened since.
+    Returns the version written.
+    """
+    with _transaction(path, expected_version) as conn:
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0] + 1
+        conn.execute("DELETE FROM team_slots")
+        conn.execute("DELETE FROM playthroughs")
+        conn.execute("DELETE FROM games")
+        for (game, playthrough), entries in data.groupby(["Game", "Playthrough"], sort=False):
+            playthrough_id = _playthrough_id(conn, game, playthrough, create=True)
+            _insert_slots(conn, _slot_rows(entries, playthrough_id))
+    return version
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+# The 18 Pokémon types, each type's position is its bit in a type mask
+TYPES = [
+    "Normal", "Fire", "Water", "Electric", "Grass", "Ice", "Fighting", "Poison", "Ground",
+    "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy"
+]
+TYPE_BITS = {name: 1 << position for position, name in enumerate(TYPES)}
+
+TEAM_COLUMNS = ["Game", "Playthrough"]
+
+
+def type_mask(types):
+    """Encode a list of type names as an 18-bit mask, ignoring unknown types."""
+    mask = 0
+    for name in types if isinstance(types, (list, tuple, np.ndarray)) else []:
+        mask |= TYPE_BITS.get(str(name).capitalize(), 0)
+    return mask
+
+
+def type_names(mask):
+    """Decode a type mask into its type names."""
+    return [name for name, bit in TYPE_BITS.items() if mask & bit]
+
+
+def encode_types(data):
+    """Return each row's type mask, encoding the types of each distinct Pokémon only once."""
+    codes, _ = pd.factorize(data["Pokemon"])
+    if not len(codes):
+        return np.zeros(0, dtype=np.uint32)
+    first_rows = np.full(codes.max() + 1, -1)
+    first_rows[codes[::-1]] = np.arange(len(codes))[::-1]  # Leaves the first row of each Pokémon
+    species_masks = np.array([type_mask(types) for types in data["Type"].to_numpy()[first_rows]], dtype=np.uint32)
+    return species_masks[codes]
+
+
+def popcount(masks):
+    """Return the number of types set in each mask."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    return np.unpackbits(masks.view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1).reshape(masks.shape)
+
+
+def type_bits(masks):
+    """Expand masks into a boolean matrix with one column per type."""
+    return (np.asarray(masks, dtype=np.uint32)[:, None] >> np.arange(len(TYPES), dtype=np.uint32)) & 1 == 1
+
+
+def count_types(masks):
+    """Count how often each type appears across masks, most common first, like value_counts."""
+    frequencies = np.bincount(masks, minlength=1 << len(TYPES))
+    present = np.flatnonzero(frequencies)
+    counts = frequencies[present] @ type_bits(present)
+    counts = pd.Series(counts, index=pd.Index(TYPES, name="Type"), name="count")
+    return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+
+def team_codes(data):
+    """Return each row's team number and the sorted (Game, Playthrough) index the numbers refer to."""
+    game_codes, games = pd.factorize(data["Game"], sort=True)
+    playthrough_codes, playthroughs = pd.factorize(data["Playthrough"], sort=True)
+    combined = game_codes.astype(np.int64) * len(playthroughs) + playthrough_codes
+    codes, teams = pd.factorize(combined, sort=True)
+    index = pd.MultiIndex.from_arrays(
+        [games[teams // len(playthroughs)], playthroughs[teams % len(playthroughs)]], names=TEAM_COLUMNS
+    )
+    return codes, index
+
+
+def _union_by_team(codes, team_count, masks):
+    coverage = np.zeros(team_count, dtype=np.uint32)
+    np.bitwise_or.at(coverage, codes, masks)
+    return coverage
+
+
+def team_coverage(data, masks):
+    """Return the union of type masks of each (Game, Playthrough) team."""
+    codes, teams = team_codes(data)
+    return pd.Series(_union_by_team(codes, len(teams), masks), index=teams)
+
+
+# Damage multipliers that differ from 1, as attacking type -> {defending type: multiplier}
+EFFECTIVENESS_CHART = {
+    "Normal": {"Rock": 0.5, "Ghost": 0, "Steel": 0.5},
+    "Fire": {"Fire": 0.5, "Water": 0.5, "Grass": 2, "Ice": 2, "Bug": 2, "Rock": 0.5, "Dragon": 0.5, "Steel": 2},
+    "Water": {"Fire": 2, "Water": 0.5, "Grass": 0.5, "Ground": 2, "Rock": 2, "Dragon": 0.5},
+    "Electric": {"Water": 2, "Electric": 0.5, "Grass": 0.5, "Ground": 0, "Flying": 2, "Dragon": 0.5},
+    "Grass": {"Fire": 0.5, "Water": 2, "Grass": 0.5, "Poison": 0.5, "Ground": 2, "Flying": 0.5, "Bug": 0.5,
+              "Rock": 2, "Dragon": 0.5, "Steel": 0.5},
+    "Ice": {"Fire": 0.5, "Water": 0.5, "Grass": 2, "Ice": 0.5, "Ground": 2, "Flying": 2, "Dragon": 2, "Steel": 0.5},
+    "Fighting": {"Normal": 2, "Ice": 2, "Poison": 0.5, "Flying": 0.5, "Psychic": 0.5, "Bug": 0.5, "Rock": 2,
+                 "Ghost": 0, "Dark": 2, "Steel": 2, "Fairy": 0.5},
+    "Poison": {"Grass": 2, "Poison": 0.5, "Ground": 0.5, "Rock": 0.5, "Ghost": 0.5, "Steel": 0, "Fairy": 2},
+    "Ground": {"Fire": 2, "Electric": 2, "Grass": 0.5, "Poison": 2, "Flying": 0, "Bug": 0.5, "Rock": 2, "Steel": 2},
+    "Flying": {"Electric": 0.5, "Grass": 2, "Fighting": 2, "Bug": 2, "Rock": 0.5, "Steel": 0.5},
+    "Psychic": {"Fighting": 2, "Poison": 2, "Psychic": 0.5, "Dark": 0, "Steel": 0.5},
+    "Bug": {"Fire": 0.5, "Grass": 2, "Fighting": 0.5, "Poison": 0.5, "Flying": 0.5, "Psychic": 2, "Ghost": 0.5,
+            "Dark": 2, "Steel": 0.5, "Fairy": 0.5},
+    "Rock": {"Fire": 2, "Ice": 2, "Fighting": 0.5, "Ground": 0.5, "Flying": 2, "Bug": 2, "Steel": 0.5},
+    "Ghost": {"Normal": 0, "Psychic": 2, "Ghost": 2, "Dark": 0.5},
+    "Dragon": {"Dragon": 2, "Steel": 0.5, "Fairy": 0},
+    "Dark": {"Fighting": 0.5, "Psychic": 2, "Ghost": 2, "Dark": 0.5, "Fairy": 0.5},
+    "Steel": {"Fire": 0.5, "Water": 0.5, "Electric": 0.5, "Ice": 2, "Rock": 2, "Steel": 0.5, "Fairy": 2},
+    "Fairy": {"Fire": 0.5, "Fighting": 2, "Poison": 0.5, "Dragon": 2, "Dark": 2, "Steel": 0.5},
+}
+
+# 18×18 table of multipliers, rows are attacking types and columns defending types
+EFFECTIVENESS = np.ones((len(TYPES), len(TYPES)))
+for attacker, multipliers in EFFECTIVENESS_CHART.items():
+    for defender, multiplier in multipliers.items():
+        EFFECTIVENESS[TYPES.index(attacker), TYPES.index(defender)] = multiplier
+
+# For each defending type, the mask of attacking types that are super effective against it
+SUPER_EFFECTIVE_AGAINST = ((EFFECTIVENESS > 1).T.astype(np.uint32) << np.arange(len(TYPES), dtype=np.uint32)).sum(
+    axis=1, dtype=np.uint32
+)
+
+# A team shares a weakness when at least this many of its members are weak to the same type
+SHARED_WEAKNESS_MIN = 3
+
+
+def defensive_multipliers(masks):
+    """Return the damage multiplier of every attacking type against each mask, one row per mask."""
+    unique_masks, inverse = np.unique(np.asarray(masks, dtype=np.uint32), return_inverse=True)
+    bits = type_bits(unique_masks)
+    # A dual type takes the product of both of its types' multipliers
+    multipliers = np.where(bits[:, None, :], EFFECTIVENESS[None, :, :], 1).prod(axis=2)
+    return multipliers[inverse.reshape(-1)]
+
+
+def offensive_coverage(coverage_masks):
+    """Return which defending types each team can hit super effectively with its own types."""
+    coverage_masks = np.asarray(coverage_masks, dtype=np.uint32)
+    return (coverage_masks[:, None] & SUPER_EFFECTIVE_AGAINST[None, :]) != 0
+
+
+def team_matchups(data, masks):
+    """Analyse every team's offensive coverage, weaknesses and resistances at once."""
+    codes, teams = team_codes(data)
+
+    # Each team must be one contiguous block of rows, the stores already keep them that way
+    order = np.arange(len(codes))
+    starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    if len(starts) != len(teams):
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    block_teams = codes[order[starts]]
+
+    # Multipliers are only computed for the few distinct type combinations, then gathered per member
+    mask_codes, unique_masks = pd.factorize(np.asarray(masks, dtype=np.uint32))
+    multipliers = defensive_multipliers(unique_masks)
+    member_masks = mask_codes[order]
+
+    # Count, per team and attacking type, the members weak to it and those resisting or immune to it
+    weak = np.zeros((len(teams), len(TYPES)), dtype=np.int32)
+    resist = np.zeros_like(weak)
+    if len(starts):
+        weak[block_teams] = np.add.reduceat((multipliers > 1).astype(np.int8)[member_masks], starts, axis=0, dtype=np.int32)
+        resist[block_teams] = np.add.reduceat((multipliers < 1).astype(np.int8)[member_masks], starts, axis=0, dtype=np.int32)
+
+    hits = offensive_coverage(_union_by_team(codes, len(teams), masks))
+    exposed = weak > resist
+    shared = weak >= SHARED_WEAKNESS_MIN
+
+    # Label each distinct set of shared weaknesses once
+    shared_codes, shared_masks = pd.factorize(shared.astype(np.uint32) @ (1 << np.arange(len(TYPES), dtype=np.uint32)))
+    shared_labels = np.array([", ".join(type_names(mask)) for mask in shared_masks], dtype=object)
+    summary = pd.DataFrame({
+        "Offensive Coverage": hits.sum(axis=1),
+        "Weaknesses": exposed.sum(axis=1),
+        "Resistances": (resist > weak).sum(axis=1),
+        "Shared Weaknesses": shared_labels[shared_codes],
+    }, index=teams)
+    return {
+        "teams": summary,
+        "exposed_teams": pd.Series(exposed.sum(axis=0), index=TYPES),
+        "shared_weakness_teams": pd.Series(shared.sum(axis=0), index=TYPES),
+        "unhit_teams": pd.Series((~hits).sum(axis=0), index=TYPES),
+    }
@@ -1,66 +1,180 @@
-import matplotlib.pyplot as plt
+import hashlib
+import io
+import pandas as pd
 import streamlit as st
-import seaborn as sns
 import numpy as np
+from utils.memo import BoundedCache, fingerprint, memoize
+from utils.distribution import HISTOGRAM_BINS, describe
+from utils.perf import span
 
-def plot_pie_chart(data, title):
-    """Render a pie chart using matplotlib."""
+# Rendered charts are kept as PNG bytes, the least recently used are evicted first
+CHART_CACHE_MAX_ENTRIES = 256
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_DPI = 200
+
+# Scatter plots with more rows than this are drawn as hexbin density plots instead
+SCATTER_DENSITY_THRESHOLD = 5000
+SCATTER_GRIDSIZE = 40
+
+CHART_CACHE = BoundedCache(CHART_CACHE_MAX_ENTRIES, CHART_CACHE_MAX_BYTES)
+
+_plt = None
+
+def _pyplot():
+    """Import matplotlib on first use, so it is only loaded once a chart actually renders."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")  # Render off-screen, skipping GUI backend detection
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+def _chart_key(value):
+    """Return a hashable key describing a chart input."""
+    if getattr(value, "fingerprint", None) is not None:
+        return value.fingerprint
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return fingerprint(value, columns=None if isinstance(value, pd.Series) else list(value.columns))
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, hashlib.blake2b(value.tobytes(), digest_size=16).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(_chart_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((name, _chart_key(item)) for name, item in value.items())
+    return repr(value)
+
+def _render(draw, *args):
+    """Draw a figure and return it as PNG bytes, always releasing the figure."""
+    with span(f"render:{draw.__name__.removeprefix('_draw_')}"):
+        plt = _pyplot()
+        fig = draw(*args)
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=CHART_DPI, bbox_inches="tight")
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+
+def _show(draw, *args, key=None):
+    """Display a chart, rendering it only if the same chart has not been rendered before.
+
+    Charts are identified by key if given, otherwise by hashing every argument.
+    """
+    key = tuple(_chart_key(arg) for arg in args) if key is None else key
+    image = memoize(draw.__name__, key, _render, draw, *args, cache=CHART_CACHE)
+    st.image(image)
+
+def _draw_pie_chart(data, title):
+    plt = _pyplot()
     fig, ax = plt.subplots()
     ax.pie(data.values, labels=data.index, autopct='%1.1f%%', startangle=90)
     ax.axis('equal')
-    plt.title(title)
-    st.pyplot(fig)
+    ax.set_title(title)
+    return fig
+
+def plot_pie_chart(data, title):
+    """Render a pie chart using matplotlib."""
+    _show(_draw_pie_chart, data, title)
+
+def _point_counts(data):
+    """Collapse identical (x, y) points into one row each, with how many times it occurs."""
+    counts = data.dropna().value_counts(sort=False)
+    return counts.index.get_level_values(0), counts.index.get_level_values(1), counts.to_numpy()
 
-def plot_scatter(data, x_col, y_col, title, x_label, y_label):
-    """Render a scatter plot using matplotlib."""
+def _draw_scatter(data, title, x_label, y_label):
+    plt = _pyplot()
     fig, ax = plt.subplots()
-    ax.scatter(data[x_col], data[y_col], alpha=0.7, edgecolors='w')
+    # Repeated points are drawn once, sized by how often they occur
+    x, y, counts = _point_counts(data)
+    ax.scatter(x, y, s=36 * np.sqrt(counts), alpha=0.7, edgecolors='w')
     ax.set_title(title)
     ax.set_xlabel(x_label)
     ax.set_ylabel(y_label)
-    st.pyplot(fig)
+    return fig
+
+def _draw_density(data, title, x_label, y_label):
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    x, y, counts = _point_counts(data)
+    hexes = ax.hexbin(x, y, C=counts, reduce_C_function=np.sum, gridsize=SCATTER_GRIDSIZE, bins='log', cmap='Blues')
+    fig.colorbar(hexes, ax=ax, label="Count")
+    ax.set_title(title)
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    return fig
+
+def plot_scatter(data, x_col, y_col, title, x_label, y_label, density_threshold=None, key=None):
+    """Render a scatter plot using matplotlib, switching to a hexbin density plot for large data.
 
-def plot_histogram(data, column, title, x_label, bins=20):
-    """Render a histogram using matplotlib."""
+    Pass the key data is memoized under to look the chart up without hashing data.
+    """
+    threshold = SCATTER_DENSITY_THRESHOLD if density_threshold is None else density_threshold
+    draw = _draw_density if len(data) > threshold else _draw_scatter
+    chart_key = None if key is None else (key, x_col, y_col, title, x_label, y_label)
+    _show(draw, data[[x_col, y_col]], title, x_label, y_label, key=chart_key)
+
+def _draw_histogram(distribution, title, x_label):
+    plt = _pyplot()
     fig, ax = plt.subplots()
-    ax.hist(data[column], bins=bins, alpha=0.7, color='skyblue', edgecolor='black')
+    edges = distribution.edges
+    ax.bar(edges[:-1], distribution.counts, width=np.diff(edges), align='edge', alpha=0.7, color='skyblue', edgecolor='black')
     ax.set_title(title)
     ax.set_xlabel(x_label)
     ax.set_ylabel("Frequency")
-    st.pyplot(fig)
+    return fig
 
-def plot_bar(data, title, x_label, y_label):
-    """Render a bar chart using matplotlib."""
+def plot_histogram(data, column, title, x_label, bins=HISTOGRAM_BINS, key=None):
+    """Render a histogram using matplotlib, see plot_scatter for key."""
+    _show(_draw_histogram, describe(data[column], bins, key=None if key is None else (key, column)), title, x_label)
+
+def _draw_bar(data, title, x_label, y_label):
+    plt = _pyplot()
     fig, ax = plt.subplots()
     ax.bar(data.index, data.values, color='lightgreen', edgecolor='black')
     ax.set_title(title)
     ax.set_xlabel(x_label)
     ax.set_ylabel(y_label)
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot(fig)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    return fig
 
-def plot_box(data, column, title, y_label):
-    """Render a box plot using matplotlib."""
+def plot_bar(data, title, x_label, y_label):
+    """Render a bar chart using matplotlib."""
+    _show(_draw_bar, data, title, x_label, y_label)
+
+def _draw_box(box_stats, title, y_label):
+    plt = _pyplot()
     fig, ax = plt.subplots()
-    ax.boxplot(data[column], vert=True, patch_artist=True, boxprops=dict(facecolor='skyblue', color='black'))
+    ax.bxp([box_stats], patch_artist=True, boxprops=dict(facecolor='skyblue', edgecolor='black'))
     ax.set_title(title)
     ax.set_ylabel(y_label)
-    st.pyplot(fig)
+    return fig
 
-def plot_grouped_bar(data, category_col, title, x_label, y_label):
-    """Render a grouped bar chart."""
-    grouped_counts = data[category_col].value_counts()
+def plot_box(summary, column, title, y_label):
+    """Render a box plot of one column of a StatSummary using matplotlib."""
+    _show(_draw_box, summary.box_stats(column), title, y_label)
+
+def _draw_grouped_bar(grouped_counts, title, x_label, y_label):
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10, 6))
     grouped_counts.plot(kind="bar", ax=ax, color="lightcoral", edgecolor="black")
     ax.set_title(title)
     ax.set_xlabel(x_label)
     ax.set_ylabel(y_label)
-    st.pyplot(fig)
+    return fig
 
-def plot_radar(stats, labels, title):
-    """Render a radar chart for base stats."""
+def plot_grouped_bar(data, category_col, title, x_label, y_label):
+    """Render a grouped bar chart."""
+    plot_counts_bar(data[category_col].value_counts(), title, x_label, y_label)
+
+def plot_counts_bar(counts, title, x_label, y_label):
+    """Render a grouped bar chart from precomputed counts."""
+    _show(_draw_grouped_bar, counts, title, x_label, y_label)
+
+def _draw_radar(stats, labels, title):
+    plt = _pyplot()
     angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
-    stats += stats[:1]  # Complete the circle
+    stats = list(stats) + list(stats[:1])  # Complete the circle
     angles += angles[:1]
 
     fig, ax = plt.subplots(figsize=(12, 8), subplot_kw=dict(polar=True))
@@ -70,22 +184,35 @@ def plot_radar(stats, labels, title):
     ax.set_xticks(angles[:-1])
     ax.set_xticklabels(labels)
     ax.set_title(title)
-    st.pyplot(fig)
+    return fig
 
-def plot_kde(data, column, title, x_label):
-    """Render a KDE plot using seaborn."""
+def plot_radar(stats, labels, title):
+    """Render a radar chart for base stats."""
+    _show(_draw_radar, list(stats), list(labels), title)
+
+def _draw_kde(distribution, title, x_label):
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(8, 6))
-    sns.kdeplot(data[column], ax=ax, shade=True, color="skyblue")
+    grid, density = distribution.kde()
+    ax.fill_between(grid, density, color="skyblue", alpha=0.25)
+    ax.plot(grid, density, color="skyblue")
     ax.set_title(title)
     ax.set_xlabel(x_label)
     ax.set_ylabel("Density")
-    st.pyplot(fig)
+    return fig
 
-def plot_average_bar(stats, title="Average Stats"):
+def plot_kde(data, column, title, x_label, key=None):
+    """Render a KDE plot from the binned distribution, see plot_scatter for key."""
+    _show(_draw_kde, describe(data[column], key=None if key is None else (key, column)), title, x_label)
+
+def _draw_average_bar(stats, title):
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(8,6))
     ax.bar(stats.index, stats.values, color='skyblue', edgecolor='black')
     ax.set_title(title)
     ax.set_ylabel("Average Value")
     ax.set_xlabel("Stat")
-    st.pyplot(fig)
+    return fig
 
+def plot_average_bar(stats, title="Average Stats"):
+    _show(_draw_average_bar, stats, title)